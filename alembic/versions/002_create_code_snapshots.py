@@ -0,0 +1,45 @@
+"""Create code snapshot history
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create code_snapshots table
+    op.create_table('code_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('candidate_id', sa.Integer(), nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('assessment_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('keyframe_version', sa.Integer(), nullable=False),
+        sa.Column('is_keyframe', sa.Boolean(), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('code_length', sa.Integer(), nullable=True),
+        sa.Column('language', sa.String(), nullable=False),
+        sa.Column('source', sa.Enum('AUTOSAVE', 'RUN', 'SUBMIT', name='codesnapshotsource'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id'], ),
+        sa.ForeignKeyConstraint(['candidate_id'], ['candidates.id'], ),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('candidate_id', 'assessment_id', 'question_id', 'version', name='uq_code_snapshots_version')
+    )
+    op.create_index(op.f('ix_code_snapshots_id'), 'code_snapshots', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_code_snapshots_id'), table_name='code_snapshots')
+    op.drop_table('code_snapshots')
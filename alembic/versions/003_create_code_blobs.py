@@ -0,0 +1,104 @@
+"""Move submission source into content-addressed code blobs
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import hashlib
+import zlib
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    # Create code_blobs table
+    code_blobs = op.create_table('code_blobs',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('hash')
+    )
+    op.add_column('submissions', sa.Column('code_hash', sa.String(length=64), nullable=True))
+
+    # Move existing source text into blobs, storing each distinct text once
+    connection = op.get_bind()
+    submissions = sa.table('submissions',
+        sa.column('id', sa.Integer()),
+        sa.column('code', sa.Text()),
+        sa.column('code_hash', sa.String())
+    )
+    stored = set()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(submissions.c.id, submissions.c.code)
+            .where(submissions.c.id > last_id)
+            .order_by(submissions.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        blobs = []
+        updates = []
+        for submission_id, code in rows:
+            data = (code or "").encode("utf-8")
+            code_hash = hashlib.sha256(data).hexdigest()
+            if code_hash not in stored:
+                stored.add(code_hash)
+                blobs.append({"hash": code_hash, "data": zlib.compress(data), "size": len(data)})
+            updates.append({"submission_id": submission_id, "new_hash": code_hash})
+
+        if blobs:
+            connection.execute(code_blobs.insert(), blobs)
+        connection.execute(
+            submissions.update()
+            .where(submissions.c.id == sa.bindparam('submission_id'))
+            .values(code_hash=sa.bindparam('new_hash')),
+            updates
+        )
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table('submissions') as batch_op:
+        batch_op.alter_column('code_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.create_foreign_key('fk_submissions_code_hash', 'code_blobs', ['code_hash'], ['hash'])
+        batch_op.create_index('ix_submissions_code_hash', ['code_hash'], unique=False)
+        batch_op.drop_column('code')
+
+
+def downgrade() -> None:
+    op.add_column('submissions', sa.Column('code', sa.Text(), nullable=True))
+
+    connection = op.get_bind()
+    code_blobs = sa.table('code_blobs',
+        sa.column('hash', sa.String()),
+        sa.column('data', sa.LargeBinary())
+    )
+    submissions = sa.table('submissions',
+        sa.column('code', sa.Text()),
+        sa.column('code_hash', sa.String())
+    )
+    for code_hash, data in connection.execute(sa.select(code_blobs.c.hash, code_blobs.c.data)):
+        connection.execute(
+            submissions.update()
+            .where(submissions.c.code_hash == code_hash)
+            .values(code=zlib.decompress(data).decode("utf-8"))
+        )
+
+    with op.batch_alter_table('submissions') as batch_op:
+        batch_op.alter_column('code', existing_type=sa.Text(), nullable=False)
+        batch_op.drop_index('ix_submissions_code_hash')
+        batch_op.drop_constraint('fk_submissions_code_hash', type_='foreignkey')
+        batch_op.drop_column('code_hash')
+    op.drop_table('code_blobs')
@@ -0,0 +1,129 @@
+"""Partition proctoring events by month
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime, timezone
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+PREMAKE_MONTHS = 2
+
+COLUMNS = (
+    "id, candidate_id, assessment_id, event_type, event_data, severity, is_violation, "
+    "user_agent, ip_address, screen_resolution, timestamp"
+)
+
+
+def _add_months(moment, months):
+    month_index = moment.month - 1 + months
+    return moment.replace(year=moment.year + month_index // 12, month=month_index % 12 + 1)
+
+
+def _create_partition(start):
+    end = _add_months(start, 1)
+    op.execute(
+        f"CREATE TABLE proctoring_events_y{start.year}m{start.month:02d} PARTITION OF proctoring_events "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+
+    if connection.dialect.name != 'postgresql':
+        # SQLite has no partitioning; keep one append-only table and index the
+        # columns that admin views and retention filter on
+        with op.batch_alter_table('proctoring_events') as batch_op:
+            batch_op.alter_column('timestamp', existing_type=sa.DateTime(timezone=True), nullable=False,
+                                  existing_server_default=sa.text('(CURRENT_TIMESTAMP)'))
+        op.create_index('ix_proctoring_events_timestamp', 'proctoring_events', ['timestamp'], unique=False)
+        op.create_index('ix_proctoring_events_assessment_timestamp', 'proctoring_events', ['assessment_id', 'timestamp'], unique=False)
+        return
+
+    # Move the current table aside, keeping its id sequence for the new one
+    op.rename_table('proctoring_events', 'proctoring_events_legacy')
+    op.execute("ALTER TABLE proctoring_events_legacy RENAME CONSTRAINT proctoring_events_pkey TO proctoring_events_legacy_pkey")
+    op.execute("ALTER SEQUENCE proctoring_events_id_seq OWNED BY NONE")
+
+    # The partition key has to be part of the primary key
+    op.execute("""
+        CREATE TABLE proctoring_events (
+            id INTEGER NOT NULL DEFAULT nextval('proctoring_events_id_seq'),
+            candidate_id INTEGER NOT NULL REFERENCES candidates (id),
+            assessment_id INTEGER REFERENCES assessments (id),
+            event_type proctoringeventtype NOT NULL,
+            event_data TEXT,
+            severity VARCHAR,
+            is_violation BOOLEAN,
+            user_agent VARCHAR,
+            ip_address VARCHAR,
+            screen_resolution VARCHAR,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute("ALTER SEQUENCE proctoring_events_id_seq OWNED BY proctoring_events.id")
+    op.create_index('ix_proctoring_events_timestamp', 'proctoring_events', ['timestamp'], unique=False)
+    op.create_index('ix_proctoring_events_assessment_timestamp', 'proctoring_events', ['assessment_id', 'timestamp'], unique=False)
+
+    # Monthly partitions covering the existing rows and the months ahead;
+    # anything outside them (e.g. skewed client clocks) lands in the default
+    oldest = connection.execute(sa.text("SELECT min(timestamp) FROM proctoring_events_legacy")).scalar()
+    now = datetime.now(timezone.utc)
+    start = (oldest or now).astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last = _add_months(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0), PREMAKE_MONTHS)
+    while start <= last:
+        _create_partition(start)
+        start = _add_months(start, 1)
+    op.execute("CREATE TABLE proctoring_events_default PARTITION OF proctoring_events DEFAULT")
+
+    op.execute(
+        f"INSERT INTO proctoring_events ({COLUMNS}) "
+        f"SELECT {COLUMNS.replace('timestamp', 'COALESCE(timestamp, CURRENT_TIMESTAMP)')} FROM proctoring_events_legacy"
+    )
+    op.drop_table('proctoring_events_legacy')
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+
+    if connection.dialect.name != 'postgresql':
+        op.drop_index('ix_proctoring_events_assessment_timestamp', table_name='proctoring_events')
+        op.drop_index('ix_proctoring_events_timestamp', table_name='proctoring_events')
+        with op.batch_alter_table('proctoring_events') as batch_op:
+            batch_op.alter_column('timestamp', existing_type=sa.DateTime(timezone=True), nullable=True,
+                                  existing_server_default=sa.text('(CURRENT_TIMESTAMP)'))
+        return
+
+    op.rename_table('proctoring_events', 'proctoring_events_partitioned')
+    op.execute("ALTER SEQUENCE proctoring_events_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE proctoring_events (
+            id INTEGER NOT NULL DEFAULT nextval('proctoring_events_id_seq'),
+            candidate_id INTEGER NOT NULL REFERENCES candidates (id),
+            assessment_id INTEGER REFERENCES assessments (id),
+            event_type proctoringeventtype NOT NULL,
+            event_data TEXT,
+            severity VARCHAR,
+            is_violation BOOLEAN,
+            user_agent VARCHAR,
+            ip_address VARCHAR,
+            screen_resolution VARCHAR,
+            timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT proctoring_events_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE proctoring_events_id_seq OWNED BY proctoring_events.id")
+    op.execute(f"INSERT INTO proctoring_events ({COLUMNS}) SELECT {COLUMNS} FROM proctoring_events_partitioned")
+    # Dropping the parent drops all of its partitions
+    op.drop_table('proctoring_events_partitioned')
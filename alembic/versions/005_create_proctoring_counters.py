@@ -0,0 +1,61 @@
+"""Create proctoring counter checkpoints
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create proctoring_counters table
+    proctoring_counters = op.create_table('proctoring_counters',
+        sa.Column('assessment_id', sa.Integer(), nullable=False),
+        sa.Column('candidate_id', sa.Integer(), nullable=False),
+        sa.Column('event_counts', sa.Text(), nullable=False),
+        sa.Column('violation_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id'], ),
+        sa.ForeignKeyConstraint(['candidate_id'], ['candidates.id'], ),
+        sa.PrimaryKeyConstraint('assessment_id', 'candidate_id')
+    )
+
+    # Seed the checkpoints from the events recorded so far; the live Redis
+    # counters are loaded from these checkpoints
+    connection = op.get_bind()
+    totals = connection.execute(sa.text(
+        "SELECT assessment_id, candidate_id, event_type, count(*), "
+        "sum(CASE WHEN is_violation THEN 1 ELSE 0 END) "
+        "FROM proctoring_events WHERE assessment_id IS NOT NULL "
+        "GROUP BY assessment_id, candidate_id, event_type"
+    )).fetchall()
+
+    checkpoints = {}
+    for assessment_id, candidate_id, event_type, count, violations in totals:
+        checkpoint = checkpoints.setdefault(
+            (assessment_id, candidate_id),
+            {"assessment_id": assessment_id, "candidate_id": candidate_id, "event_counts": {}, "violation_count": 0}
+        )
+        # Event types are stored by name; counters use the enum values
+        checkpoint["event_counts"][event_type.lower()] = count
+        checkpoint["violation_count"] += violations or 0
+
+    if checkpoints:
+        op.bulk_insert(proctoring_counters, [
+            {**checkpoint, "event_counts": json.dumps(checkpoint["event_counts"])}
+            for checkpoint in checkpoints.values()
+        ])
+
+
+def downgrade() -> None:
+    op.drop_table('proctoring_counters')
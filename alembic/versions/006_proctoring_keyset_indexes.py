@@ -0,0 +1,35 @@
+"""Add keyset pagination indexes for proctoring events
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Every filter combination of the admin event browser scans one of these
+    # in (timestamp, id) order
+    op.drop_index('ix_proctoring_events_assessment_timestamp', table_name='proctoring_events')
+    op.create_index('ix_proctoring_events_assessment_timestamp', 'proctoring_events', ['assessment_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_proctoring_events_assessment_candidate_timestamp', 'proctoring_events', ['assessment_id', 'candidate_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_proctoring_events_assessment_type_timestamp', 'proctoring_events', ['assessment_id', 'event_type', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_proctoring_events_assessment_violations', 'proctoring_events', ['assessment_id', 'timestamp', 'id'], unique=False,
+                    postgresql_where=sa.text('is_violation'), sqlite_where=sa.text('is_violation'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_proctoring_events_assessment_violations', table_name='proctoring_events')
+    op.drop_index('ix_proctoring_events_assessment_type_timestamp', table_name='proctoring_events')
+    op.drop_index('ix_proctoring_events_assessment_candidate_timestamp', table_name='proctoring_events')
+    op.drop_index('ix_proctoring_events_assessment_timestamp', table_name='proctoring_events')
+    op.create_index('ix_proctoring_events_assessment_timestamp', 'proctoring_events', ['assessment_id', 'timestamp'], unique=False)
@@ -0,0 +1,99 @@
+"""Move proctoring browser info into a device table
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import hashlib
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+DEVICE_MATCH = (
+    "COALESCE(proctoring_events.user_agent, '') = COALESCE(proctoring_devices.user_agent, '') "
+    "AND COALESCE(proctoring_events.ip_address, '') = COALESCE(proctoring_devices.ip_address, '') "
+    "AND COALESCE(proctoring_events.screen_resolution, '') = COALESCE(proctoring_devices.screen_resolution, '')"
+)
+
+
+def _fingerprint(user_agent, ip_address, screen_resolution):
+    raw = "\x1f".join(value or "" for value in (user_agent, ip_address, screen_resolution))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+
+    # Create proctoring_devices table
+    proctoring_devices = op.create_table('proctoring_devices',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('user_agent', sa.String(), nullable=True),
+        sa.Column('ip_address', sa.String(), nullable=True),
+        sa.Column('screen_resolution', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('fingerprint')
+    )
+    op.create_index(op.f('ix_proctoring_devices_id'), 'proctoring_devices', ['id'], unique=False)
+    op.add_column('proctoring_events', sa.Column('device_id', sa.Integer(), nullable=True))
+
+    # One device row per distinct browser/system combination
+    devices = connection.execute(sa.text(
+        "SELECT DISTINCT user_agent, ip_address, screen_resolution FROM proctoring_events"
+    )).fetchall()
+    if devices:
+        op.bulk_insert(proctoring_devices, [
+            {
+                "fingerprint": _fingerprint(user_agent, ip_address, screen_resolution),
+                "user_agent": user_agent,
+                "ip_address": ip_address,
+                "screen_resolution": screen_resolution
+            }
+            for user_agent, ip_address, screen_resolution in devices
+        ])
+        # UPDATE ... FROM is a single hash join on both PostgreSQL and SQLite >= 3.33
+        op.execute(
+            f"UPDATE proctoring_events SET device_id = proctoring_devices.id "
+            f"FROM proctoring_devices WHERE {DEVICE_MATCH}"
+        )
+
+    if connection.dialect.name == 'postgresql':
+        op.execute("ALTER TABLE proctoring_events ALTER COLUMN event_data TYPE JSONB USING NULLIF(event_data, '')::jsonb")
+        # SQLite can only add the constraint by rebuilding the table, which
+        # would also rebuild every index; it does not enforce it by default
+        op.create_foreign_key('fk_proctoring_events_device_id', 'proctoring_events', 'proctoring_devices', ['device_id'], ['id'])
+
+    # SQLite >= 3.35 drops unindexed columns in place
+    op.drop_column('proctoring_events', 'user_agent')
+    op.drop_column('proctoring_events', 'ip_address')
+    op.drop_column('proctoring_events', 'screen_resolution')
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+
+    op.add_column('proctoring_events', sa.Column('user_agent', sa.String(), nullable=True))
+    op.add_column('proctoring_events', sa.Column('ip_address', sa.String(), nullable=True))
+    op.add_column('proctoring_events', sa.Column('screen_resolution', sa.String(), nullable=True))
+
+    op.execute(
+        "UPDATE proctoring_events SET user_agent = proctoring_devices.user_agent, "
+        "ip_address = proctoring_devices.ip_address, screen_resolution = proctoring_devices.screen_resolution "
+        "FROM proctoring_devices WHERE proctoring_events.device_id = proctoring_devices.id"
+    )
+
+    if connection.dialect.name == 'postgresql':
+        op.execute("ALTER TABLE proctoring_events ALTER COLUMN event_data TYPE TEXT USING event_data::text")
+        op.drop_constraint('fk_proctoring_events_device_id', 'proctoring_events', type_='foreignkey')
+
+    op.drop_column('proctoring_events', 'device_id')
+    op.drop_index(op.f('ix_proctoring_devices_id'), table_name='proctoring_devices')
+    op.drop_table('proctoring_devices')
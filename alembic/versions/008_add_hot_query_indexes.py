@@ -0,0 +1,43 @@
+"""Add composite and partial indexes for hot queries
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Final submissions of a candidate (scoring, results, exports)
+    op.create_index('ix_submissions_candidate_assessment_final', 'submissions', ['candidate_id', 'assessment_id', 'is_final_submission'], unique=False)
+    # Latest submission for a question (question page)
+    op.create_index('ix_submissions_candidate_question_submitted', 'submissions', ['candidate_id', 'question_id', 'submitted_at'], unique=False)
+    op.create_index(op.f('ix_submission_results_submission_id'), 'submission_results', ['submission_id'], unique=False)
+    op.create_index(op.f('ix_test_cases_question_id'), 'test_cases', ['question_id'], unique=False)
+
+    # Admin lists only show active rows
+    op.create_index('ix_candidates_active', 'candidates', ['id'], unique=False,
+                    postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active'))
+    op.create_index('ix_questions_active', 'questions', ['id'], unique=False,
+                    postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active'))
+
+    # ProctoringEvent(assessment_id, timestamp) is covered by
+    # ix_proctoring_events_assessment_timestamp since revision 006
+
+
+def downgrade() -> None:
+    op.drop_index('ix_questions_active', table_name='questions')
+    op.drop_index('ix_candidates_active', table_name='candidates')
+    op.drop_index(op.f('ix_test_cases_question_id'), table_name='test_cases')
+    op.drop_index(op.f('ix_submission_results_submission_id'), table_name='submission_results')
+    op.drop_index('ix_submissions_candidate_question_submitted', table_name='submissions')
+    op.drop_index('ix_submissions_candidate_assessment_final', table_name='submissions')
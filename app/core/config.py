@@ -7,9 +7,57 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "dev-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
+    ADMIN_PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    
+    # Password hashing: bcrypt work factor and the dedicated thread pool running it
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # Further logins are turned away until the queue drains
+    
+    # Shared secret for the /internal endpoints; empty disables them
+    INTERNAL_API_TOKEN: str = ""
     
     # Database settings
     DATABASE_URL: str = "sqlite:///./mercer_hr.db"
+    # Connection pools per process. A web process holds at most
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW connections on the sync engine plus
+    # ASYNC_DB_POOL_SIZE + ASYNC_DB_MAX_OVERFLOW on the async one, 20 by
+    # default; multiplied by the number of web processes this must stay below
+    # the server's max_connections. A replica gets its own sync-sized pool.
+    # "worker" processes (RQ worker, maintenance) use WORKER_* sizes for both
+    # engines so they do not crowd out the web pools
+    DB_POOL_PROFILE: str = "web"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    ASYNC_DB_POOL_SIZE: int = 5
+    ASYNC_DB_MAX_OVERFLOW: int = 5
+    WORKER_DB_POOL_SIZE: int = 2
+    WORKER_DB_MAX_OVERFLOW: int = 3
+    DB_POOL_TIMEOUT_SECONDS: int = 10  # Wait for a free connection before failing the request
+    DB_POOL_RECYCLE_SECONDS: int = 30 * 60  # Replace connections before server/proxy idle timeouts drop them
+    DB_POOL_PRE_PING: bool = True
+    # Behind PgBouncer in transaction mode: no local pool, no prepared statements
+    DB_PGBOUNCER: bool = False
+    # Optional read replica for admin pages and exports; a client that just
+    # committed reads from the primary for this long so it sees its own writes
+    DATABASE_REPLICA_URL: str = ""
+    READ_YOUR_WRITES_SECONDS: int = 10
+    # SQLite files (single-node installs): WAL and tuned pragmas on every
+    # connection and one writer connection per engine. The sync and async
+    # writers, and other processes (e.g. the RQ worker), take turns through
+    # SQLITE_BUSY_TIMEOUT_MS, so run one web process next to the worker
+    SQLITE_PERFORMANCE_MODE: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_MMAP_SIZE_MB: int = 256
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # Resolved candidate sessions are cached in Redis; changes to the candidate
+    # invalidate them, the TTL bounds staleness after assessment edits
+    CANDIDATE_CONTEXT_TTL_SECONDS: int = 5 * 60
+    
+    # Tests: raise instead of lazy-loading relationships the candidate pages did not eager-load
+    DB_RAISE_ON_LAZY_LOAD: bool = False
     
     # Redis settings
     REDIS_URL: str = "redis://localhost:6379"
@@ -21,7 +69,43 @@ class Settings(BaseSettings):
     # Code execution settings
     CODE_EXECUTION_TIMEOUT: int = 10  # seconds
     CODE_EXECUTION_MEMORY_LIMIT: int = 128  # MB
+
+    # Submission status push settings
+    SUBMISSION_EVENT_TTL_SECONDS: int = 60 * 60  # 1 hour
+    SUBMISSION_STREAM_TIMEOUT_SECONDS: int = 120
+    SUBMISSION_STREAM_KEEPALIVE_SECONDS: int = 15
+    
+    # Queued/running submissions live in Redis until they are persisted
+    SUBMISSION_JOB_TTL_SECONDS: int = 24 * 60 * 60  # 24 hours
+    SUBMISSION_MAX_ATTEMPTS: int = 2
+    SUBMISSION_RECONCILE_INTERVAL_SECONDS: int = 60
+    SUBMISSION_RECONCILE_GRACE_SECONDS: int = 30
     
+    # Auto-saves are buffered in Redis and written to the database in batches
+    AUTOSAVE_FLUSH_INTERVAL_SECONDS: int = 60
+    AUTOSAVE_FLUSH_BATCH_SIZE: int = 500
+    AUTOSAVE_BUFFER_TTL_SECONDS: int = 24 * 60 * 60  # 24 hours
+    AUTOSAVE_FLUSH_MAX_ATTEMPTS: int = 5  # Then the candidate's buffer is parked until their next save
+    
+    # Code history is stored as deltas against a full keyframe every N versions
+    CODE_HISTORY_KEYFRAME_INTERVAL: int = 20
+    
+    # Proctoring events
+    PROCTORING_BATCH_MAX_EVENTS: int = 200
+    PROCTORING_MAX_EVENT_AGE_SECONDS: int = 15 * 60  # Older client timestamps are replaced by server time
+    PROCTORING_RETENTION_MONTHS: int = 12  # 0 keeps events forever
+    PROCTORING_PARTITION_PREMAKE_MONTHS: int = 2
+    PROCTORING_MAINTENANCE_INTERVAL_SECONDS: int = 24 * 60 * 60  # 24 hours
+    PROCTORING_COUNTERS_CHECKPOINT_SECONDS: int = 60
+    PROCTORING_COUNTERS_TTL_SECONDS: int = 7 * 24 * 60 * 60  # 7 days
+    PROCTORING_PAGE_SIZE: int = 50
+    
+    # Streaming suspicion score per candidate
+    PROCTORING_SCORE_HALF_LIFE_SECONDS: int = 5 * 60
+    PROCTORING_SCORE_ALERT_THRESHOLD: float = 10.0
+    PROCTORING_SCORE_ALERT_COOLDOWN_SECONDS: int = 10 * 60
+    PROCTORING_ALERT_FEED_SIZE: int = 200
+
     # Google Drive settings (optional)
     GOOGLE_DRIVE_FOLDER_ID: str = ""
     GOOGLE_DRIVE_SERVICE_ACCOUNT_JSON: str = ""
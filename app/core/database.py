@@ -19,28 +19,374 @@
 #     finally:
 #         db.close()
 
-from sqlalchemy import create_engine
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from fastapi import Request, Response
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from app.core.config import settings
 
+class _CheckoutTimingMixin:
+    """Counts checkouts and how long they waited for a free connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = {"checkouts": 0, "timeouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+        # Checkouts happen concurrently on threadpool threads
+        self._checkout_stats_lock = threading.Lock()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._checkout_stats_lock:
+                self.checkout_stats["checkouts"] += 1
+                self.checkout_stats["timeouts"] += timed_out
+                self.checkout_stats["wait_seconds_total"] += waited
+                self.checkout_stats["wait_seconds_max"] = max(self.checkout_stats["wait_seconds_max"], waited)
+
+    def checkout_snapshot(self) -> Dict[str, Any]:
+        """Consistent copy of checkout_stats"""
+        with self._checkout_stats_lock:
+            return dict(self.checkout_stats)
+
+class TimedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+def pool_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """create_engine pool arguments for this process (DB_POOL_PROFILE)"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"connect_args": {"check_same_thread": False}}
+    if settings.DB_PGBOUNCER:
+        # PgBouncer owns the server connections; prepared statements would be
+        # sent to whichever backend the next transaction lands on
+        options = {"poolclass": NullPool}
+        if is_async:
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        return options
+
+    if settings.DB_POOL_PROFILE == "worker":
+        pool_size, max_overflow = settings.WORKER_DB_POOL_SIZE, settings.WORKER_DB_MAX_OVERFLOW
+    elif is_async:
+        pool_size, max_overflow = settings.ASYNC_DB_POOL_SIZE, settings.ASYNC_DB_MAX_OVERFLOW
+    else:
+        pool_size, max_overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING
+    }
+
+def compact_json(obj: Any) -> str:
+    """Store JSON columns without the default whitespace"""
+    return json.dumps(obj, separators=(",", ":"))
+
+def sqlite_profile_enabled(url: str) -> bool:
+    """Whether ``url`` is a SQLite file the performance profile applies to"""
+    parsed = make_url(url)
+    return (
+        settings.SQLITE_PERFORMANCE_MODE
+        and parsed.get_backend_name() == "sqlite"
+        and parsed.database not in (None, "", ":memory:")
+    )
+
+def sqlite_pragmas() -> List[str]:
+    return [
+        # Readers keep working while the writer commits
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        # NORMAL is durable across application crashes in WAL mode, only a
+        # power loss can roll back the last transactions
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA temp_store=MEMORY"
+    ]
+
+def configure_sqlite(target: Engine, writer: bool = False) -> None:
+    """Apply the SQLite profile to every connection ``target`` opens"""
+
+    @event.listens_for(target, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        if writer:
+            # Leave BEGIN to _begin_immediate instead of the driver
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+        cursor.close()
+
+    if writer:
+        @event.listens_for(target, "begin")
+        def _begin_immediate(connection):
+            # Take the write lock up front: upgrading a read snapshot later
+            # fails with "database is locked" without waiting for busy_timeout
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+def sqlite_writer_options(is_async: bool = False) -> Dict[str, Any]:
+    """The single writer connection of an engine.
+
+    The sync and async engines each have one; between the two (and other
+    processes) BEGIN IMMEDIATE waits out the other writer via busy_timeout.
+    A lock shared across both would have the sync checkout block the event
+    loop from async handlers using get_db.
+    """
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "connect_args": {"check_same_thread": False}
+    }
+
+WRITER_INFO_KEY = "bound_to_writer"
+
+class SingleWriterSession(Session):
+    """Session that moves its transaction to the writer engine at the first write.
+
+    Until then statements run on the regular bind; from the first flush or
+    DML statement on, reads go to the writer as well so the transaction
+    sees its own changes.
+    """
+
+    def __init__(self, *args, writer: Optional[Engine] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writer = writer
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.writer is not None and (
+            self.info.get(WRITER_INFO_KEY) or self._flushing or isinstance(clause, UpdateBase)
+        ):
+            self.info[WRITER_INFO_KEY] = True
+            return self.writer
+        return super().get_bind(mapper, clause=clause, **kw)
+
+@event.listens_for(SingleWriterSession, "after_transaction_end")
+def _release_writer(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(WRITER_INFO_KEY, None)
+
+SQLITE_PROFILE = sqlite_profile_enabled(settings.DATABASE_URL)
+
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    json_serializer=compact_json,
+    **pool_options(settings.DATABASE_URL)
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# With the SQLite profile every write goes through one dedicated connection;
+# elsewhere the primary engine writes as before
+writer_engine = create_engine(
+    settings.DATABASE_URL,
+    json_serializer=compact_json,
+    **sqlite_writer_options()
+) if SQLITE_PROFILE else engine
+
+if SQLITE_PROFILE:
+    configure_sqlite(engine)
+    configure_sqlite(writer_engine, writer=True)
+
+SessionLocal = sessionmaker(
+    class_=SingleWriterSession, autocommit=False, autoflush=False, bind=engine, writer=writer_engine
+)
+
+# Optional streaming replica for heavy admin reads and exports
+replica_engine = create_engine(
+    settings.DATABASE_REPLICA_URL,
+    json_serializer=compact_json,
+    **pool_options(settings.DATABASE_REPLICA_URL)
+) if settings.DATABASE_REPLICA_URL else None
+
+ReplicaSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=replica_engine
+) if replica_engine is not None else SessionLocal
+
+# Async drivers for the same database, used by the hot candidate endpoints
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the asyncio one"""
+    parsed = make_url(url)
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{ASYNC_DRIVERS[parsed.get_backend_name()]}").render_as_string(hide_password=False)
+
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    json_serializer=compact_json,
+    **pool_options(settings.DATABASE_URL, is_async=True)
+)
+
+async_writer_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    json_serializer=compact_json,
+    **sqlite_writer_options(is_async=True)
+) if SQLITE_PROFILE else async_engine
+
+if SQLITE_PROFILE:
+    configure_sqlite(async_engine.sync_engine)
+    configure_sqlite(async_writer_engine.sync_engine, writer=True)
+
+# Objects stay usable after commit: touching an expired attribute outside
+# the session's greenlet would raise instead of lazily reloading it
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    sync_session_class=SingleWriterSession,
+    autoflush=False,
+    expire_on_commit=False,
+    writer=async_writer_engine.sync_engine
+)
 
 Base = declarative_base()
 
+def pool_stats(target: Engine) -> Dict[str, Any]:
+    """Current occupancy and checkout waits of an engine's pool"""
+    pool = target.pool
+    stats = {"pool": type(pool).__name__, "profile": settings.DB_POOL_PROFILE}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow
+        })
+    if isinstance(pool, _CheckoutTimingMixin):
+        checkout_stats = pool.checkout_snapshot()
+        checkouts = checkout_stats["checkouts"]
+        stats.update({
+            "checkouts": checkouts,
+            "timeouts": checkout_stats["timeouts"],
+            "wait_ms_avg": round(checkout_stats["wait_seconds_total"] * 1000 / checkouts, 2) if checkouts else 0.0,
+            "wait_ms_max": round(checkout_stats["wait_seconds_max"] * 1000, 2)
+        })
+    return stats
+
+def database_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """pool_stats of the engines of this process"""
+    stats = {
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine.sync_engine)
+    }
+    if replica_engine is not None:
+        stats["replica"] = pool_stats(replica_engine)
+    if SQLITE_PROFILE:
+        stats["sqlite_writer"] = pool_stats(writer_engine)
+        stats["sqlite_async_writer"] = pool_stats(async_writer_engine.sync_engine)
+    return stats
+
 # Auto-create tables on startup
 def init_db():
     import app.models  # make sure all models (User, etc.) are imported
     Base.metadata.create_all(bind=engine)
 
-def get_db():
-    db = SessionLocal()
+# Read-your-writes: a request that commits to the primary marks its client,
+# whose reads then skip the replica until it has caught up
+READ_PRIMARY_COOKIE = "read_primary_until"
+REQUEST_STATE_INFO_KEY = "request_state"
+WROTE_INFO_KEY = "wrote_primary"
+
+@event.listens_for(Session, "after_flush")
+def _note_primary_write(session, flush_context):
+    if REQUEST_STATE_INFO_KEY in session.info:
+        session.info[WROTE_INFO_KEY] = True
+
+@event.listens_for(Session, "after_commit")
+def _flag_request_wrote_primary(session):
+    if session.info.pop(WROTE_INFO_KEY, False):
+        session.info[REQUEST_STATE_INFO_KEY].wrote_primary = True
+
+@event.listens_for(Session, "after_rollback")
+def _forget_primary_write(session):
+    session.info.pop(WROTE_INFO_KEY, None)
+
+def read_primary_cookie() -> str:
+    """Set-Cookie value pinning a client's reads to the primary"""
+    response = Response()
+    response.set_cookie(
+        READ_PRIMARY_COOKIE,
+        str(int(time.time()) + settings.READ_YOUR_WRITES_SECONDS),
+        max_age=settings.READ_YOUR_WRITES_SECONDS,
+        httponly=True,
+        samesite="lax"
+    )
+    return response.headers["set-cookie"]
+
+class ReadYourWritesMiddleware:
+    """Pin the client's reads to the primary if the request committed there.
+
+    Plain ASGI so streaming responses (SSE, exports) pass through unbuffered;
+    commits made after the headers went out are not seen.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or replica_engine is None:
+            await self.app(scope, receive, send)
+            return
+
+        # request.state of every Request built for this scope lives here
+        state = scope.setdefault("state", {})
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and state.get(WROTE_INFO_KEY):
+                MutableHeaders(scope=message).append("set-cookie", read_primary_cookie())
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+def reads_primary(request: Request) -> bool:
+    """Whether the client committed recently enough that the replica may lag behind it"""
+    try:
+        return int(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def get_db(request: Request):
+    db = SessionLocal(info={REQUEST_STATE_INFO_KEY: request.state})
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db(request: Request):
+    """Session for read-only admin pages and exports.
+
+    Reads go to DATABASE_REPLICA_URL when one is configured, except for
+    clients that committed to the primary within READ_YOUR_WRITES_SECONDS,
+    e.g. the page an admin is redirected to after adding a candidate.
+    """
+    if replica_engine is None or reads_primary(request):
+        yield from get_db(request)
+        return
+    db = ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,24 +1,116 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Tuple
+import redis
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status ,Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.database import get_db
 from app.models.user import User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# Hashes with any other work factor are upgraded (or downgraded) on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
 security = HTTPBearer()
 
+# bcrypt is deliberately slow; it runs on a few dedicated threads so logins
+# neither block the event loop nor take over the default executor
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_password_stats = {
+    "pending": 0,
+    "completed": 0,
+    "rejected": 0,
+    "wait_seconds": 0.0,
+    "max_wait_seconds": 0.0,
+    "hash_seconds": 0.0
+}
+
+class PasswordHashingBusy(Exception):
+    """More password checks are waiting than PASSWORD_HASH_MAX_QUEUE allows"""
+
+redis_conn = redis.Redis.from_url(settings.REDIS_URL)
+
+# Changing any of these must end the cached admin sessions of a user
+PRINCIPAL_FIELDS = ("email", "is_admin", "is_active")
+CHANGED_USERS_INFO_KEY = "admin_principals:changed"
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def run_password_job(fn: Callable, *args: Any) -> Any:
+    """Run a bcrypt call on the password executor, rejecting it when the queue is full"""
+    if _password_stats["pending"] >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+        _password_stats["rejected"] += 1
+        raise PasswordHashingBusy()
+
+    submitted = time.perf_counter()
+
+    def job():
+        started = time.perf_counter()
+        return fn(*args), started, time.perf_counter()
+
+    # The counters are only touched from the event loop thread
+    _password_stats["pending"] += 1
+    try:
+        result, started, finished = await asyncio.get_running_loop().run_in_executor(password_executor, job)
+    finally:
+        _password_stats["pending"] -= 1
+
+    _password_stats["completed"] += 1
+    _password_stats["wait_seconds"] += started - submitted
+    _password_stats["max_wait_seconds"] = max(_password_stats["max_wait_seconds"], started - submitted)
+    _password_stats["hash_seconds"] += finished - started
+    return result
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password off the event loop; also returns a new hash when the work factor changed"""
+    return await run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a new password off the event loop"""
+    return await run_password_job(pwd_context.hash, password)
+
+def password_hashing_stats() -> Dict[str, Any]:
+    """Queue and timing metrics of the password executor in this process"""
+    completed = _password_stats["completed"]
+    pending = _password_stats["pending"]
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_queue": settings.PASSWORD_HASH_MAX_QUEUE,
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        "in_flight": min(pending, settings.PASSWORD_HASH_WORKERS),
+        "queued": max(0, pending - settings.PASSWORD_HASH_WORKERS),
+        "completed": completed,
+        "rejected": _password_stats["rejected"],
+        "avg_wait_ms": round(_password_stats["wait_seconds"] / completed * 1000, 2) if completed else 0.0,
+        "max_wait_ms": round(_password_stats["max_wait_seconds"] * 1000, 2),
+        "avg_hash_ms": round(_password_stats["hash_seconds"] / completed * 1000, 2) if completed else 0.0
+    }
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -26,7 +118,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    # The token id keys the admin principal cache
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -69,6 +162,74 @@ async def get_current_user(
 #             detail="Not enough permissions"
 #         )
 #     return current_user
+@dataclass(frozen=True, slots=True)
+class AdminPrincipal:
+    """Signed-in admin as resolved from an access token"""
+    id: int
+    email: str
+
+def principal_key(jti: str) -> str:
+    return f"admin:principal:{jti}"
+
+def user_principals_key(user_id: int) -> str:
+    """Set of token ids with a cached principal for a user"""
+    return f"admin:principals:user:{user_id}"
+
+def get_cached_principal(jti: str) -> Optional[AdminPrincipal]:
+    try:
+        raw = redis_conn.get(principal_key(jti))
+    except redis.RedisError as e:
+        logger.warning(f"Admin principal cache unavailable: {e}")
+        return None
+    return AdminPrincipal(**json.loads(raw)) if raw else None
+
+def cache_principal(jti: str, principal: AdminPrincipal, expires_at: float) -> None:
+    """Cache a principal for ADMIN_PRINCIPAL_CACHE_TTL_SECONDS, never past the token expiry"""
+    ttl = int(min(settings.ADMIN_PRINCIPAL_CACHE_TTL_SECONDS, expires_at - time.time()))
+    if ttl <= 0:
+        return
+    try:
+        pipe = redis_conn.pipeline()
+        pipe.set(principal_key(jti), json.dumps({"id": principal.id, "email": principal.email}), ex=ttl)
+        pipe.sadd(user_principals_key(principal.id), jti)
+        pipe.expire(user_principals_key(principal.id), settings.ADMIN_PRINCIPAL_CACHE_TTL_SECONDS)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Admin principal cache unavailable: {e}")
+
+def invalidate_user_principals(*user_ids: int) -> None:
+    """Drop every cached principal of these users, e.g. after deactivating them"""
+    for user_id in user_ids:
+        key = user_principals_key(user_id)
+        jtis = redis_conn.smembers(key)
+        redis_conn.delete(key, *[principal_key(jti.decode()) for jti in jtis])
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault(CHANGED_USERS_INFO_KEY, set())
+    for instance in session.deleted:
+        if isinstance(instance, User):
+            changed.add(instance.id)
+    for instance in session.dirty:
+        if isinstance(instance, User):
+            state = inspect(instance)
+            if any(state.attrs[field].history.has_changes() for field in PRINCIPAL_FIELDS):
+                changed.add(instance.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    changed = session.info.pop(CHANGED_USERS_INFO_KEY, None)
+    if not changed:
+        return
+    try:
+        invalidate_user_principals(*changed)
+    except redis.RedisError as e:
+        logger.error(f"Failed to invalidate admin principals of users {sorted(changed)}: {e}")
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop(CHANGED_USERS_INFO_KEY, None)
+
 async def get_current_admin(request: Request, db: Session = Depends(get_db)):
         token = request.cookies.get("access_token")
         if not token:
@@ -83,7 +244,19 @@ async def get_current_admin(request: Request, db: Session = Depends(get_db)):
                 raise HTTPException(status_code=403, detail="Invalid token")
         except JWTError:
             raise HTTPException(status_code=403, detail="Invalid token")
+        
+        # Tokens issued before token ids were added are always looked up
+        jti = payload.get("jti")
+        if jti:
+            principal = get_cached_principal(jti)
+            if principal:
+                return principal
+        
         user = db.query(User).filter(User.email == email, User.is_admin == True).first()
         if user is None or not user.is_active:
             raise HTTPException(status_code=403, detail="User not found or not admin")
-        return user
+        
+        principal = AdminPrincipal(id=user.id, email=user.email)
+        if jti:
+            cache_principal(jti, principal, payload["exp"])
+        return principal
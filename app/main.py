@@ -84,6 +84,7 @@
 
 
 import os
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
@@ -93,10 +94,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 
 from app.core.config import settings
-from app.core.database import engine, SessionLocal, Base
+from app.core.database import engine, SessionLocal, Base, ReadYourWritesMiddleware
 from app.core.logging_config import setup_logging
-from app.routers import auth, admin, candidate, api
+from app.routers import auth, admin, candidate, api, internal
 from app.services.admin_setup import create_admin_user
+from app.services.autosave_buffer import run_autosave_flusher, flush_autosaves_now
+from app.services.proctoring_counters import run_counter_checkpointer, checkpoint_counters_now
 
 # Setup logging
 setup_logging()
@@ -130,9 +133,27 @@ async def lifespan(app: FastAPI):
     # Create admin user
     await create_admin_user()
     
+    # Write-behind flusher for buffered auto-saves
+    autosave_flusher = asyncio.create_task(run_autosave_flusher())
+    
+    # Periodic checkpoints of the live proctoring counters
+    counter_checkpointer = asyncio.create_task(run_counter_checkpointer())
+    
     logger.info("Startup complete!")
     yield
     logger.info("Shutting down...")
+    
+    autosave_flusher.cancel()
+    try:
+        await asyncio.to_thread(flush_autosaves_now)
+    except Exception as e:
+        logger.error(f"Final auto-save flush failed: {e}")
+    
+    counter_checkpointer.cancel()
+    try:
+        await asyncio.to_thread(checkpoint_counters_now)
+    except Exception as e:
+        logger.error(f"Final proctoring counter checkpoint failed: {e}")
 
 app = FastAPI(
     title="Mercer HR Assessment Platform",
@@ -150,6 +171,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Send the client's next admin reads to the primary after it committed
+app.add_middleware(ReadYourWritesMiddleware)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
@@ -158,6 +182,7 @@ app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(admin.router, prefix="/admin", tags=["admin"])
 app.include_router(candidate.router, prefix="/candidate", tags=["candidate"])
 app.include_router(api.router, prefix="/api", tags=["api"])
+app.include_router(internal.router, prefix="/internal", tags=["internal"])
 
 # Templates
 templates = Jinja2Templates(directory="app/templates")
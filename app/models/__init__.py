@@ -2,8 +2,9 @@ from app.models.user import User
 from app.models.candidate import Candidate
 from app.models.question import Question, TestCase
 from app.models.assessment import Assessment, AssessmentQuestion, AssessmentCandidate
-from app.models.submission import Submission, SubmissionResult
-from app.models.proctoring import ProctoringEvent
+from app.models.submission import Submission, SubmissionResult, CodeBlob
+from app.models.proctoring import ProctoringEvent, ProctoringCounter, ProctoringDevice
+from app.models.code_history import CodeSnapshot
 
 __all__ = [
     "User",
@@ -15,5 +16,9 @@ __all__ = [
     "AssessmentCandidate",
     "Submission",
     "SubmissionResult",
-    "ProctoringEvent"
+    "CodeBlob",
+    "ProctoringEvent",
+    "ProctoringCounter",
+    "ProctoringDevice",
+    "CodeSnapshot"
 ]
\ No newline at end of file
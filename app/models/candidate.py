@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class Candidate(Base):
     __tablename__ = "candidates"
+    __table_args__ = (
+        Index("ix_candidates_active", "id", postgresql_where=text("is_active"), sqlite_where=text("is_active")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
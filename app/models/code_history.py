@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, LargeBinary, Enum, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+import enum
+
+class CodeSnapshotSource(enum.Enum):
+    AUTOSAVE = "autosave"
+    RUN = "run"
+    SUBMIT = "submit"
+
+class CodeSnapshot(Base):
+    __tablename__ = "code_snapshots"
+    __table_args__ = (
+        # Also serves as the lookup index for reconstruction
+        UniqueConstraint("candidate_id", "assessment_id", "question_id", "version", name="uq_code_snapshots_version"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id"), nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    assessment_id = Column(Integer, ForeignKey("assessments.id"), nullable=False)
+    
+    # Versions are numbered per (candidate, assessment, question)
+    version = Column(Integer, nullable=False)
+    keyframe_version = Column(Integer, nullable=False)  # Keyframe this delta applies to
+    is_keyframe = Column(Boolean, default=False, nullable=False)
+    
+    # zlib-compressed full text for keyframes, zlib-compressed delta otherwise
+    payload = Column(LargeBinary, nullable=False)
+    code_length = Column(Integer, default=0)
+    language = Column(String, nullable=False)
+    source = Column(Enum(CodeSnapshotSource), nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
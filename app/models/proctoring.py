@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Enum
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Enum, Index, JSON
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB
 from app.core.database import Base
 import enum
+import hashlib
 
 class ProctoringEventType(enum.Enum):
     TAB_SWITCH = "tab_switch"
@@ -15,24 +17,77 @@ class ProctoringEventType(enum.Enum):
     KEY_COMBINATION = "key_combination"
     SUSPICIOUS_ACTIVITY = "suspicious_activity"
 
+class ProctoringDevice(Base):
+    """Browser/system info shared by all events from one candidate session"""
+    __tablename__ = "proctoring_devices"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    fingerprint = Column(String(64), unique=True, nullable=False)
+    
+    user_agent = Column(String)
+    ip_address = Column(String)
+    screen_resolution = Column(String)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    @staticmethod
+    def fingerprint_of(user_agent: str, ip_address: str, screen_resolution: str) -> str:
+        raw = "\x1f".join(value or "" for value in (user_agent, ip_address, screen_resolution))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
 class ProctoringEvent(Base):
     __tablename__ = "proctoring_events"
+    __table_args__ = (
+        # Keyset pagination on (timestamp, id) for the admin event browser and its filters
+        Index("ix_proctoring_events_assessment_timestamp", "assessment_id", "timestamp", "id"),
+        Index("ix_proctoring_events_assessment_candidate_timestamp", "assessment_id", "candidate_id", "timestamp", "id"),
+        Index("ix_proctoring_events_assessment_type_timestamp", "assessment_id", "event_type", "timestamp", "id"),
+        Index(
+            "ix_proctoring_events_assessment_violations", "assessment_id", "timestamp", "id",
+            postgresql_where=text("is_violation"),
+            sqlite_where=text("is_violation")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     candidate_id = Column(Integer, ForeignKey("candidates.id"), nullable=False)
     assessment_id = Column(Integer, ForeignKey("assessments.id"))
     
     event_type = Column(Enum(ProctoringEventType), nullable=False)
-    event_data = Column(Text)  # JSON string with additional event data
+    event_data = Column(JSON().with_variant(JSONB(), "postgresql"))  # Additional event data
     severity = Column(String, default="medium")  # low, medium, high
     is_violation = Column(Boolean, default=False)
     
-    # Browser/System info
-    user_agent = Column(String)
-    ip_address = Column(String)
-    screen_resolution = Column(String)
+    # Browser/System info, stored once per device
+    device_id = Column(Integer, ForeignKey("proctoring_devices.id"))
     
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key on PostgreSQL (monthly range partitions, see proctoring_storage)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     
     # Relationships
-    candidate = relationship("Candidate", back_populates="proctoring_events")
\ No newline at end of file
+    candidate = relationship("Candidate", back_populates="proctoring_events")
+    device = relationship("ProctoringDevice")
+    
+    @property
+    def user_agent(self):
+        return self.device.user_agent if self.device else None
+    
+    @property
+    def ip_address(self):
+        return self.device.ip_address if self.device else None
+    
+    @property
+    def screen_resolution(self):
+        return self.device.screen_resolution if self.device else None
+
+class ProctoringCounter(Base):
+    """Checkpoint of the live per-candidate event counters kept in Redis"""
+    __tablename__ = "proctoring_counters"
+    
+    assessment_id = Column(Integer, ForeignKey("assessments.id"), primary_key=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id"), primary_key=True)
+    
+    event_counts = Column(Text, nullable=False, default="{}")  # JSON: event type -> count
+    violation_count = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, Enum, Float, Boolean, DateTime, ForeignKey
-from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Enum, Float, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func, text
+from sqlalchemy.orm import relationship, deferred, query_expression
 from app.core.database import Base
 import enum
 
@@ -15,10 +15,14 @@ class DifficultyLevel(enum.Enum):
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_active", "id", postgresql_where=text("is_active"), sqlite_where=text("is_active")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
-    description = Column(Text, nullable=False)
+    # Large text is only loaded by the pages that show it
+    description = deferred(Column(Text, nullable=False))
     question_type = Column(Enum(QuestionType), nullable=False)
     difficulty = Column(Enum(DifficultyLevel), default=DifficultyLevel.MEDIUM)
     tags = Column(Text)  # JSON string of tags
@@ -26,8 +30,8 @@ class Question(Base):
     time_limit_minutes = Column(Integer, default=30)
     
     # For coding questions
-    template_code = Column(Text)  # Starter code template
-    solution_code = Column(Text)  # Reference solution
+    template_code = deferred(Column(Text))  # Starter code template
+    solution_code = deferred(Column(Text))  # Reference solution
     allowed_languages = Column(Text)  # JSON string of allowed languages
     
     # For MCQ questions
@@ -38,6 +42,9 @@ class Question(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    # Start of the description, filled by queries using with_expression()
+    description_preview = query_expression()
+    
     # Relationships
     test_cases = relationship("TestCase", back_populates="question", cascade="all, delete-orphan")
     assessment_questions = relationship("AssessmentQuestion", back_populates="question")
@@ -46,9 +53,10 @@ class TestCase(Base):
     __tablename__ = "test_cases"
     
     id = Column(Integer, primary_key=True, index=True)
-    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
-    input_data = Column(Text, nullable=False)
-    expected_output = Column(Text, nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
+    # Loaded together, only when judging or showing the test case
+    input_data = deferred(Column(Text, nullable=False), group="io")
+    expected_output = deferred(Column(Text, nullable=False), group="io")
     is_public = Column(Boolean, default=True, nullable=False)  # Public test cases shown to candidate
     weight = Column(Float, default=1.0)  # Weight for scoring
     time_limit_seconds = Column(Integer, default=5)
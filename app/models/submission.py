@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float, Enum, LargeBinary, Index, event, inspect
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred, Session
+from sqlalchemy.dialects import postgresql, sqlite
 from app.core.database import Base
 import enum
+import hashlib
+import zlib
 
 class SubmissionStatus(enum.Enum):
     PENDING = "pending"
@@ -18,16 +21,42 @@ class VerdictType(enum.Enum):
     RTE = "RTE"  # Runtime Error
     CE = "CE"  # Compilation Error
 
+class CodeBlob(Base):
+    """Deduplicated submission source, addressed by the SHA-256 of its text"""
+    __tablename__ = "code_blobs"
+    
+    hash = Column(String(64), primary_key=True)
+    data = Column(LargeBinary, nullable=False)  # zlib-compressed UTF-8 text
+    size = Column(Integer, nullable=False)  # Uncompressed length in bytes
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    @staticmethod
+    def hash_code(code: str) -> str:
+        return hashlib.sha256(code.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def compress(code: str) -> bytes:
+        return zlib.compress(code.encode("utf-8"))
+    
+    def decompress(self) -> str:
+        return zlib.decompress(self.data).decode("utf-8")
+
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        # Final submissions of a candidate (scoring, results, exports)
+        Index("ix_submissions_candidate_assessment_final", "candidate_id", "assessment_id", "is_final_submission"),
+        # Latest submission for a question (question page)
+        Index("ix_submissions_candidate_question_submitted", "candidate_id", "question_id", "submitted_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     candidate_id = Column(Integer, ForeignKey("candidates.id"), nullable=False)
     question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
     assessment_id = Column(Integer, ForeignKey("assessments.id"))
     
-    # Submission details
-    code = Column(Text, nullable=False)
+    # Submission details; the source text lives in code_blobs (see `code`)
+    code_hash = Column(String(64), ForeignKey("code_blobs.hash"), nullable=False, index=True)
     language = Column(String, nullable=False)
     is_final_submission = Column(Boolean, default=False)
     
@@ -49,12 +78,25 @@ class Submission(Base):
     # Relationships
     candidate = relationship("Candidate", back_populates="submissions")
     results = relationship("SubmissionResult", back_populates="submission", cascade="all, delete-orphan")
+    code_blob = relationship("CodeBlob")
+    
+    @property
+    def code(self) -> str:
+        """Source text, read from the code blob unless set on this instance"""
+        if "_code" not in self.__dict__:
+            self.__dict__["_code"] = self.code_blob.decompress() if self.code_blob else None
+        return self.__dict__["_code"]
+    
+    @code.setter
+    def code(self, value: str) -> None:
+        self.__dict__["_code"] = value
+        self.code_hash = CodeBlob.hash_code(value)
 
 class SubmissionResult(Base):
     __tablename__ = "submission_results"
     
     id = Column(Integer, primary_key=True, index=True)
-    submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=False)
+    submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=False, index=True)
     test_case_id = Column(Integer, ForeignKey("test_cases.id"), nullable=False)
     
     # Test case execution results
@@ -64,10 +106,37 @@ class SubmissionResult(Base):
     score = Column(Float, default=0.0)
     
     # Output comparison
-    actual_output = Column(Text)
+    actual_output = deferred(Column(Text))
     error_message = Column(Text)
     
     executed_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    submission = relationship("Submission", back_populates="results")
\ No newline at end of file
+    submission = relationship("Submission", back_populates="results")
+
+@event.listens_for(Session, "before_flush")
+def _store_code_blobs(session, flush_context, instances):
+    """Insert the blobs of new submissions and of changed code, skipping hashes already stored"""
+    blobs = {}
+    for obj in session.new:
+        if isinstance(obj, Submission) and obj.code_hash and "_code" in obj.__dict__:
+            blobs[obj.code_hash] = obj.__dict__["_code"]
+    for obj in session.dirty:
+        # Persistent submissions whose .code was set point at a new hash
+        if (isinstance(obj, Submission) and obj.code_hash and "_code" in obj.__dict__
+                and inspect(obj).attrs.code_hash.history.has_changes()):
+            blobs[obj.code_hash] = obj.__dict__["_code"]
+    if not blobs:
+        return
+
+    rows = [
+        {"hash": code_hash, "data": CodeBlob.compress(code), "size": len(code.encode("utf-8"))}
+        for code_hash, code in blobs.items()
+    ]
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        stmt = postgresql.insert(CodeBlob).values(rows).on_conflict_do_nothing(index_elements=["hash"])
+    else:
+        stmt = sqlite.insert(CodeBlob).values(rows).on_conflict_do_nothing(index_elements=["hash"])
+    # Identical code is stored once; concurrent writers of the same hash do not conflict
+    connection.execute(stmt)
@@ -0,0 +1,81 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session, joinedload, load_only, raiseload
+
+from app.core.config import settings
+from app.models.assessment import Assessment, AssessmentCandidate, AssessmentQuestion
+from app.models.question import Question, TestCase
+from app.models.submission import Submission
+
+def _strict(*options):
+    """Loader options for a page; with DB_RAISE_ON_LAZY_LOAD every relationship
+    not loaded by ``options`` raises instead of issuing another query.
+
+    ``options`` has to list each level of a chain, since a wildcard only
+    applies to the entity at the end of the path it is chained to.
+    """
+    if not settings.DB_RAISE_ON_LAZY_LOAD:
+        return options
+    return options + tuple(option.raiseload("*") for option in options) + (raiseload("*"),)
+
+def load_assessment_page(db: Session, assessment_candidate_id: int) -> Optional[AssessmentCandidate]:
+    """Assessment candidate with its candidate, assessment and questions (2 queries)"""
+    assessment = joinedload(AssessmentCandidate.assessment)
+    assessment_questions = assessment.selectinload(Assessment.assessment_questions)
+    return db.query(AssessmentCandidate).options(*_strict(
+        joinedload(AssessmentCandidate.candidate),
+        assessment,
+        assessment_questions,
+        assessment_questions.joinedload(AssessmentQuestion.question)
+    )).filter(
+        AssessmentCandidate.id == assessment_candidate_id
+    ).populate_existing().first()
+
+def load_final_submissions(db: Session, candidate_id: int, assessment_id: int) -> List[Submission]:
+    """Status of the final submissions of a candidate in an assessment (1 query)"""
+    return db.query(Submission).options(*_strict(), load_only(
+        Submission.question_id,
+        Submission.overall_verdict,
+        Submission.total_score
+    )).filter(
+        Submission.candidate_id == candidate_id,
+        Submission.assessment_id == assessment_id,
+        Submission.is_final_submission == True
+    ).all()
+
+def load_question_page(db: Session, assessment_candidate_id: int,
+                       question_id: int) -> Tuple[Optional[AssessmentCandidate], Optional[AssessmentQuestion]]:
+    """Assessment candidate and one of its questions with the public test cases (3 queries)"""
+    assessment_candidate = db.query(AssessmentCandidate).options(*_strict(
+        joinedload(AssessmentCandidate.candidate),
+        joinedload(AssessmentCandidate.assessment)
+    )).filter(
+        AssessmentCandidate.id == assessment_candidate_id
+    ).populate_existing().first()
+    if not assessment_candidate:
+        return None, None
+
+    question = joinedload(AssessmentQuestion.question)
+    # Hidden test cases never leave the database for this page
+    test_cases = question.selectinload(Question.test_cases.and_(TestCase.is_public == True))
+    assessment_question = db.query(AssessmentQuestion).options(
+        *_strict(question, test_cases),
+        question.undefer(Question.description),
+        question.undefer(Question.template_code),
+        test_cases.undefer_group("io")
+    ).filter(
+        AssessmentQuestion.assessment_id == assessment_candidate.assessment_id,
+        AssessmentQuestion.question_id == question_id
+    ).first()
+    return assessment_candidate, assessment_question
+
+def load_latest_submission(db: Session, candidate_id: int, assessment_id: int,
+                           question_id: int) -> Optional[Submission]:
+    """Latest submission of a question together with its code (1 query)"""
+    return db.query(Submission).options(*_strict(
+        joinedload(Submission.code_blob)
+    )).filter(
+        Submission.candidate_id == candidate_id,
+        Submission.question_id == question_id,
+        Submission.assessment_id == assessment_id
+    ).order_by(Submission.submitted_at.desc()).first()
@@ -0,0 +1,228 @@
+"""Read-only rows for admin lists and exports.
+
+These pages read a handful of attributes from thousands of records, so the
+helpers select just those columns into slotted dataclasses instead of
+building ORM entities with identity-map and change-tracking state.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, TypeVar
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.assessment import (
+    Assessment, AssessmentCandidate, AssessmentCandidateStatus, AssessmentQuestion, AssessmentStatus
+)
+from app.models.candidate import Candidate
+from app.models.proctoring import ProctoringDevice, ProctoringEvent, ProctoringEventType
+from app.models.question import Question
+from app.models.submission import Submission, SubmissionResult, SubmissionStatus, VerdictType
+
+EXPORT_CHUNK_SIZE = 5000
+
+Row = TypeVar("Row")
+
+@dataclass(frozen=True, slots=True)
+class CandidateRow:
+    id: int
+    name: str
+    email: str
+    position: Optional[str]
+    experience_years: Optional[int]
+
+@dataclass(frozen=True, slots=True)
+class AssessmentRow:
+    id: int
+    title: str
+    description: Optional[str]  # First 101 characters, enough for the list preview
+    status: Optional[AssessmentStatus]
+    total_time_minutes: Optional[int]
+    max_score: Optional[float]
+    passing_score: Optional[float]
+    allow_copy_paste: Optional[bool]
+    allow_tab_switching: Optional[bool]
+    question_count: int
+    candidate_count: int
+
+@dataclass(frozen=True, slots=True)
+class ResultRow:
+    id: int
+    candidate_id: int
+    candidate_name: str
+    candidate_email: str
+    candidate_position: Optional[str]
+    status: Optional[AssessmentCandidateStatus]
+    access_token: Optional[str]
+    started_at: Optional[datetime]
+    submitted_at: Optional[datetime]
+    total_time_spent_minutes: Optional[int]
+    total_score: Optional[float]
+    percentage_score: Optional[float]
+    questions_attempted: Optional[int]
+    questions_correct: Optional[int]
+
+@dataclass(frozen=True, slots=True)
+class SubmissionRow:
+    candidate_name: str
+    candidate_email: str
+    question_title: Optional[str]
+    language: str
+    status: Optional[SubmissionStatus]
+    overall_verdict: Optional[VerdictType]
+    total_score: Optional[float]
+    execution_time_ms: Optional[int]
+    memory_used_kb: Optional[int]
+    submitted_at: Optional[datetime]
+
+@dataclass(frozen=True, slots=True)
+class ProctoringEventRow:
+    candidate_name: str
+    candidate_email: str
+    event_type: ProctoringEventType
+    severity: Optional[str]
+    is_violation: Optional[bool]
+    timestamp: datetime
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+
+def _rows(db: Session, row_type: Type[Row], statement: Any) -> List[Row]:
+    """Run ``statement`` and wrap each result row; columns are in field order"""
+    return [row_type(*row) for row in db.execute(statement)]
+
+def _stream_rows(db: Session, row_type: Type[Row], statement: Any) -> Iterator[Row]:
+    """Like _rows, without holding the whole result in memory"""
+    result = db.execute(statement.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+    for row in result:
+        yield row_type(*row)
+
+def list_active_candidates(db: Session) -> List[CandidateRow]:
+    """Active candidates in insertion order"""
+    return _rows(db, CandidateRow, select(
+        Candidate.id,
+        Candidate.name,
+        Candidate.email,
+        Candidate.position,
+        Candidate.experience_years
+    ).where(Candidate.is_active == True).order_by(Candidate.id))
+
+def list_assessment_summaries(db: Session) -> List[AssessmentRow]:
+    """All assessments with their question and candidate counts"""
+    question_count = select(func.count(AssessmentQuestion.id)).where(
+        AssessmentQuestion.assessment_id == Assessment.id
+    ).correlate(Assessment).scalar_subquery()
+    candidate_count = select(func.count(AssessmentCandidate.id)).where(
+        AssessmentCandidate.assessment_id == Assessment.id
+    ).correlate(Assessment).scalar_subquery()
+
+    return _rows(db, AssessmentRow, select(
+        Assessment.id,
+        Assessment.title,
+        func.substr(Assessment.description, 1, 101),
+        Assessment.status,
+        Assessment.total_time_minutes,
+        Assessment.max_score,
+        Assessment.passing_score,
+        Assessment.allow_copy_paste,
+        Assessment.allow_tab_switching,
+        question_count,
+        candidate_count
+    ).order_by(Assessment.id))
+
+def _results_statement(assessment_id: int):
+    return select(
+        AssessmentCandidate.id,
+        AssessmentCandidate.candidate_id,
+        Candidate.name,
+        Candidate.email,
+        Candidate.position,
+        AssessmentCandidate.status,
+        AssessmentCandidate.access_token,
+        AssessmentCandidate.started_at,
+        AssessmentCandidate.submitted_at,
+        AssessmentCandidate.total_time_spent_minutes,
+        AssessmentCandidate.total_score,
+        AssessmentCandidate.percentage_score,
+        AssessmentCandidate.questions_attempted,
+        AssessmentCandidate.questions_correct
+    ).join(
+        Candidate, Candidate.id == AssessmentCandidate.candidate_id
+    ).where(AssessmentCandidate.assessment_id == assessment_id)
+
+def list_assessment_results(db: Session, assessment_id: int, by_score: bool = False) -> List[ResultRow]:
+    """Candidates assigned to an assessment, optionally best score first"""
+    statement = _results_statement(assessment_id)
+    if by_score:
+        statement = statement.order_by(AssessmentCandidate.total_score.desc())
+    else:
+        statement = statement.order_by(AssessmentCandidate.id)
+    return _rows(db, ResultRow, statement)
+
+def iter_assessment_results(db: Session, assessment_id: int) -> Iterator[ResultRow]:
+    """Streaming variant of list_assessment_results for exports"""
+    return _stream_rows(db, ResultRow, _results_statement(assessment_id).order_by(AssessmentCandidate.id))
+
+def _submissions_statement():
+    return select(
+        Candidate.name,
+        Candidate.email,
+        Question.title,
+        Submission.language,
+        Submission.status,
+        Submission.overall_verdict,
+        Submission.total_score,
+        Submission.execution_time_ms,
+        Submission.memory_used_kb,
+        Submission.submitted_at
+    ).join(
+        Candidate, Candidate.id == Submission.candidate_id
+    ).outerjoin(
+        Question, Question.id == Submission.question_id
+    )
+
+def list_recent_submissions(db: Session, limit: int = 10) -> List[SubmissionRow]:
+    """Latest submissions across all assessments"""
+    return _rows(db, SubmissionRow, _submissions_statement().order_by(
+        Submission.submitted_at.desc()
+    ).limit(limit))
+
+def iter_final_submissions(db: Session, assessment_id: int) -> Iterator[SubmissionRow]:
+    """Final submissions of every candidate in an assessment, grouped by candidate"""
+    return _stream_rows(db, SubmissionRow, _submissions_statement().where(
+        Submission.assessment_id == assessment_id,
+        Submission.is_final_submission == True
+    ).order_by(Submission.candidate_id, Submission.id))
+
+def iter_proctoring_events(db: Session, assessment_id: int) -> Iterator[ProctoringEventRow]:
+    """Proctoring events of an assessment in time order, with device info"""
+    return _stream_rows(db, ProctoringEventRow, select(
+        Candidate.name,
+        Candidate.email,
+        ProctoringEvent.event_type,
+        ProctoringEvent.severity,
+        ProctoringEvent.is_violation,
+        ProctoringEvent.timestamp,
+        ProctoringDevice.ip_address,
+        ProctoringDevice.user_agent
+    ).join(
+        Candidate, Candidate.id == ProctoringEvent.candidate_id
+    ).outerjoin(
+        ProctoringDevice, ProctoringDevice.id == ProctoringEvent.device_id
+    ).where(
+        ProctoringEvent.assessment_id == assessment_id
+    ).order_by(ProctoringEvent.timestamp, ProctoringEvent.id))
+
+def count_passed_test_cases(db: Session, candidate_id: int, assessment_id: int) -> Dict[int, Tuple[int, int]]:
+    """{submission_id: (passed, total)} for a candidate's final submissions"""
+    rows = db.execute(select(
+        SubmissionResult.submission_id,
+        func.count(SubmissionResult.id).filter(SubmissionResult.verdict == VerdictType.OK),
+        func.count(SubmissionResult.id)
+    ).join(
+        Submission, Submission.id == SubmissionResult.submission_id
+    ).where(
+        Submission.candidate_id == candidate_id,
+        Submission.assessment_id == assessment_id,
+        Submission.is_final_submission == True
+    ).group_by(SubmissionResult.submission_id))
+    return {submission_id: (passed, total) for submission_id, passed, total in rows}
@@ -1,23 +1,34 @@
 from fastapi import APIRouter, Depends, Request, Form, UploadFile, File, HTTPException
-from fastapi.responses import RedirectResponse, Response
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, undefer_group, with_expression
 from typing import List, Optional
 import csv
 import io
 import json
+import logging
 import pandas as pd
+from urllib.parse import urlencode
 
-from app.core.database import get_db
-from app.core.security import get_current_admin
-from app.models.user import User
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.core.security import AdminPrincipal, get_current_admin
 from app.models.candidate import Candidate
 from app.models.question import Question, TestCase, QuestionType, DifficultyLevel
 from app.models.assessment import Assessment, AssessmentQuestion, AssessmentCandidate, AssessmentStatus
-from app.models.submission import Submission
-from app.models.proctoring import ProctoringEvent
+from app.models.proctoring import ProctoringEventType
+from app.repositories.read_models import (
+    list_active_candidates, list_assessment_results, list_assessment_summaries, list_recent_submissions
+)
 from app.services.candidate_service import generate_assessment_token
 from app.services.export_service import export_results_to_excel, export_results_to_csv
+from app.services.proctoring_counters import get_counters
+from app.services.proctoring_scorer import get_alerts
+from app.services.proctoring_service import get_proctoring_page, stream_candidate_timeline
+from app.utils import accepts_gzip
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -25,8 +36,8 @@ templates = Jinja2Templates(directory="app/templates")
 @router.get("/dashboard")
 async def admin_dashboard(
     request: Request,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: AdminPrincipal = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
 ):
     # Get dashboard statistics
     total_candidates = db.query(Candidate).count()
@@ -37,9 +48,7 @@ async def admin_dashboard(
     ).count()
     
     # Recent submissions
-    recent_submissions = db.query(Submission).order_by(
-        Submission.submitted_at.desc()
-    ).limit(10).all()
+    recent_submissions = list_recent_submissions(db, limit=10)
     
     return templates.TemplateResponse(
         "admin/dashboard.html",
@@ -58,10 +67,10 @@ async def admin_dashboard(
 @router.get("/candidates")
 async def list_candidates(
     request: Request,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: AdminPrincipal = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
 ):
-    candidates = db.query(Candidate).filter(Candidate.is_active == True).all()
+    candidates = list_active_candidates(db)
     return templates.TemplateResponse(
         "admin/candidates.html",
         {"request": request, "current_user": current_user, "candidates": candidates}
@@ -70,7 +79,7 @@ async def list_candidates(
 @router.get("/candidates/add")
 async def add_candidate_form(
     request: Request,
-    current_user: User = Depends(get_current_admin)
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     return templates.TemplateResponse(
         "admin/candidate_form.html",
@@ -86,7 +95,7 @@ async def add_candidate(
     position: str = Form(""),
     experience_years: int = Form(0),
     skills: str = Form(""),
-    current_user: User = Depends(get_current_admin),
+    current_user: AdminPrincipal = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     # Check if candidate already exists
@@ -120,8 +129,8 @@ async def add_candidate(
 async def edit_candidate_form(
     request: Request,
     candidate_id: int,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: AdminPrincipal = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
 ):
     candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
     if not candidate:
@@ -142,7 +151,7 @@ async def edit_candidate(
     position: str = Form(""),
     experience_years: int = Form(0),
     skills: str = Form(""),
-    current_user: User = Depends(get_current_admin),
+    current_user: AdminPrincipal = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
@@ -164,7 +173,7 @@ async def edit_candidate(
 async def import_candidates_csv(
     request: Request,
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_admin),
+    current_user: AdminPrincipal = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     if not file.filename.endswith('.csv'):
@@ -204,7 +213,7 @@ async def import_candidates_csv(
         
         db.commit()
         
-        candidates = db.query(Candidate).filter(Candidate.is_active == True).all()
+        candidates = list_active_candidates(db)
         return templates.TemplateResponse(
             "admin/candidates.html",
             {
@@ -216,7 +225,7 @@ async def import_candidates_csv(
         )
     
     except Exception as e:
-        candidates = db.query(Candidate).filter(Candidate.is_active == True).all()
+        candidates = list_active_candidates(db)
         return templates.TemplateResponse(
             "admin/candidates.html",
             {
@@ -231,10 +240,13 @@ async def import_candidates_csv(
 @router.get("/questions")
 async def list_questions(
     request: Request,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: AdminPrincipal = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
 ):
-    questions = db.query(Question).filter(Question.is_active == True).all()
+    # Only the start of the description is shown on the cards
+    questions = db.query(Question).options(
+        with_expression(Question.description_preview, func.substr(Question.description, 1, 101))
+    ).filter(Question.is_active == True).all()
     return templates.TemplateResponse(
         "admin/questions.html",
         {"request": request, "current_user": current_user, "questions": questions}
@@ -243,7 +255,7 @@ async def list_questions(
 @router.get("/questions/add")
 async def add_question_form(
     request: Request,
-    current_user: User = Depends(get_current_admin)
+    current_user: AdminPrincipal = Depends(get_current_admin)
 ):
     return templates.TemplateResponse(
         "admin/question_form.html",
@@ -262,7 +274,7 @@ async def add_question(
     time_limit_minutes: int = Form(30),
     template_code: str = Form(""),
     allowed_languages: str = Form("python,cpp,java"),
-    current_user: User = Depends(get_current_admin),
+    current_user: AdminPrincipal = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     question = Question(
@@ -286,14 +298,14 @@ async def add_question(
 async def manage_test_cases(
     request: Request,
     question_id: int,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: AdminPrincipal = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
 ):
     question = db.query(Question).filter(Question.id == question_id).first()
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
-    test_cases = db.query(TestCase).filter(TestCase.question_id == question_id).all()
+    test_cases = db.query(TestCase).options(undefer_group("io")).filter(TestCase.question_id == question_id).all()
     
     return templates.TemplateResponse(
         "admin/test_cases.html",
@@ -315,7 +327,7 @@ async def add_test_case(
     weight: float = Form(1.0),
     time_limit_seconds: int = Form(5),
     memory_limit_mb: int = Form(128),
-    current_user: User = Depends(get_current_admin),
+    current_user: AdminPrincipal = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     test_case = TestCase(
@@ -337,10 +349,10 @@ async def add_test_case(
 @router.get("/assessments")
 async def list_assessments(
     request: Request,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: AdminPrincipal = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
 ):
-    assessments = db.query(Assessment).all()
+    assessments = list_assessment_summaries(db)
     return templates.TemplateResponse(
         "admin/assessments.html",
         {"request": request, "current_user": current_user, "assessments": assessments}
@@ -349,8 +361,8 @@ async def list_assessments(
 @router.get("/assessments/add")
 async def add_assessment_form(
     request: Request,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: AdminPrincipal = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
 ):
     questions = db.query(Question).filter(Question.is_active == True).all()
     return templates.TemplateResponse(
@@ -370,7 +382,7 @@ async def add_assessment(
     allow_copy_paste: bool = Form(False),
     allow_tab_switching: bool = Form(False),
     question_ids: List[str] = Form([]),
-    current_user: User = Depends(get_current_admin),
+    current_user: AdminPrincipal = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     assessment = Assessment(
@@ -407,17 +419,15 @@ async def add_assessment(
 async def manage_assessment_candidates(
     request: Request,
     assessment_id: int,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: AdminPrincipal = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
 ):
     assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
-    candidates = db.query(Candidate).filter(Candidate.is_active == True).all()
-    assigned_candidates = db.query(AssessmentCandidate).filter(
-        AssessmentCandidate.assessment_id == assessment_id
-    ).all()
+    candidates = list_active_candidates(db)
+    assigned_candidates = list_assessment_results(db, assessment_id)
     
     return templates.TemplateResponse(
         "admin/assessment_candidates.html",
@@ -435,7 +445,7 @@ async def assign_candidate_to_assessment(
     request: Request,
     assessment_id: int,
     candidate_id: int = Form(...),
-    current_user: User = Depends(get_current_admin),
+    current_user: AdminPrincipal = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     # Check if already assigned
@@ -459,16 +469,14 @@ async def assign_candidate_to_assessment(
 async def assessment_results(
     request: Request,
     assessment_id: int,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: AdminPrincipal = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
 ):
     assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
-    results = db.query(AssessmentCandidate).filter(
-        AssessmentCandidate.assessment_id == assessment_id
-    ).order_by(AssessmentCandidate.total_score.desc()).all()
+    results = list_assessment_results(db, assessment_id, by_score=True)
     
     return templates.TemplateResponse(
         "admin/assessment_results.html",
@@ -483,8 +491,8 @@ async def assessment_results(
 @router.get("/assessments/{assessment_id}/results/export-csv")
 async def export_assessment_results_csv(
     assessment_id: int,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: AdminPrincipal = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
 ):
     csv_content = export_results_to_csv(assessment_id, db)
     
@@ -500,8 +508,8 @@ async def export_assessment_results_csv(
 @router.get("/assessments/{assessment_id}/results/export-excel")
 async def export_assessment_results_excel(
     assessment_id: int,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: AdminPrincipal = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
 ):
     excel_content = export_results_to_excel(assessment_id, db)
     
@@ -518,16 +526,44 @@ async def export_assessment_results_excel(
 async def proctoring_events(
     request: Request,
     assessment_id: int,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    candidate_id: Optional[str] = None,  # The filter form sends "" for all candidates
+    event_type: Optional[str] = None,
+    violations_only: bool = False,
+    current_user: AdminPrincipal = Depends(get_current_admin),
+    db: Session = Depends(get_read_db)
 ):
     assessment = db.query(Assessment).filter(Assessment.id == assessment_id).first()
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
-    events = db.query(ProctoringEvent).filter(
-        ProctoringEvent.assessment_id == assessment_id
-    ).order_by(ProctoringEvent.timestamp.desc()).all()
+    try:
+        candidate_id = int(candidate_id) if candidate_id else None
+        event_type_filter = ProctoringEventType(event_type) if event_type else None
+        events, next_cursor = get_proctoring_page(
+            db,
+            assessment_id,
+            limit=settings.PROCTORING_PAGE_SIZE,
+            cursor=cursor,
+            candidate_id=candidate_id,
+            event_type=event_type_filter,
+            violations_only=violations_only
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid filter or cursor")
+    
+    # Summary cards come from the live counters instead of counting rows
+    try:
+        _, counters = get_counters(assessment_id)
+    except Exception as e:
+        logger.warning(f"Failed to load proctoring counters: {e}")
+        counters = None
+    
+    filters = {
+        "candidate_id": candidate_id,
+        "event_type": event_type,
+        "violations_only": violations_only
+    }
     
     return templates.TemplateResponse(
         "admin/proctoring_events.html",
@@ -535,6 +571,63 @@ async def proctoring_events(
             "request": request,
             "current_user": current_user,
             "assessment": assessment,
-            "events": events
+            "events": events,
+            "next_cursor": next_cursor,
+            "filters": filters,
+            "filter_query": urlencode({key: value for key, value in filters.items() if value}),
+            "event_types": [event_type.value for event_type in ProctoringEventType],
+            "counters": counters
         }
+    )
+
+@router.get("/proctoring/{assessment_id}/counters")
+async def proctoring_counters(
+    request: Request,
+    assessment_id: int,
+    current_user: AdminPrincipal = Depends(get_current_admin)
+):
+    """Live per-candidate event and violation counts, cheap to poll"""
+    revision, document = get_counters(assessment_id)
+    
+    etag = f'"{assessment_id}-{revision}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(
+        content=json.dumps(document, separators=(",", ":")),
+        media_type="application/json",
+        headers=headers
+    )
+
+@router.get("/proctoring/{assessment_id}/alerts")
+async def proctoring_alerts(
+    assessment_id: int,
+    limit: int = 50,
+    current_user: AdminPrincipal = Depends(get_current_admin)
+):
+    """High-severity alerts raised by the streaming suspicion scorer"""
+    return {"assessment_id": assessment_id, "alerts": get_alerts(assessment_id, min(limit, 200))}
+
+@router.get("/proctoring/{assessment_id}/candidates/{candidate_id}/timeline")
+async def proctoring_timeline(
+    request: Request,
+    assessment_id: int,
+    candidate_id: int,
+    current_user: AdminPrincipal = Depends(get_current_admin)
+):
+    """One candidate's full event timeline as compact JSON, gzip-compressed when the client accepts it"""
+    compress = accepts_gzip(request)
+    headers = {
+        "Content-Disposition": f"inline; filename=timeline_{assessment_id}_{candidate_id}.json",
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    # The stream opens its own session; request-scoped ones close before streaming ends
+    return StreamingResponse(
+        stream_candidate_timeline(assessment_id, candidate_id, compress=compress),
+        media_type="application/json",
+        headers=headers
     )
\ No newline at end of file
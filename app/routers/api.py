@@ -223,29 +223,38 @@
 #         "elapsed_minutes": int(elapsed_minutes)
 #     }
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
-from pydantic import BaseModel
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+import asyncio
 import json
 import logging
-import redis
-from rq import Queue
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.config import settings
-from app.models.submission import Submission, SubmissionStatus
-from app.models.assessment import AssessmentCandidate
-from app.models.proctoring import ProctoringEvent, ProctoringEventType
-from app.routers.candidate import get_current_candidate_from_cookie
-from app.services.code_executor import execute_code_async
+from app.models.submission import Submission, SubmissionResult, SubmissionStatus
+from app.routers.candidate import get_candidate_context_from_cookie
+from app.services.submission_jobs import create_submission_job, enqueue_submission_job
+from app.services.autosave_buffer import buffer_autosave, flush_candidate_autosaves
+from app.services.candidate_sessions import CandidateContext
+from app.services.proctoring_service import build_proctoring_rows, insert_proctoring_rows, invalid_event_types, get_device_id
+from app.services.submission_events import (
+    TERMINAL_STATUSES,
+    serialize_submission,
+    cache_submission_status,
+    get_cached_submission_status,
+    get_submission_state,
+    get_partial_results,
+    stream_submission_events,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Redis connection for job queue
-redis_conn = redis.Redis.from_url(settings.REDIS_URL)
-job_queue = Queue('code_execution', connection=redis_conn)
-
 class CodeExecutionRequest(BaseModel):
     question_id: int
     code: str
@@ -256,53 +265,49 @@ class ProctoringEventRequest(BaseModel):
     event_type: str
     event_data: Dict[str, Any] = {}
     severity: str = "medium"
+    timestamp: Optional[datetime] = None  # When the event happened on the client
+
+class ProctoringEventBatchRequest(BaseModel):
+    events: List[ProctoringEventRequest] = Field(..., min_length=1)
+    screen_resolution: Optional[str] = None
 
 class AutoSaveRequest(BaseModel):
     question_id: int
     code: str
+    language: str = "python"
 
 @router.post("/execute-code")
 async def execute_code(
     request_data: CodeExecutionRequest,
-    current_candidate: AssessmentCandidate = Depends(get_current_candidate_from_cookie),
-    db: Session = Depends(get_db)
+    current_candidate: CandidateContext = Depends(get_candidate_context_from_cookie),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         # Verify question is part of assessment
-        question_found = False
-        for aq in current_candidate.assessment.assessment_questions:
-            if aq.question_id == request_data.question_id:
-                question_found = True
-                break
-        
-        if not question_found:
+        if request_data.question_id not in current_candidate.question_ids:
             raise HTTPException(status_code=400, detail="Question not found in assessment")
         
-        # Create submission record
-        submission = Submission(
+        # A final submit closes the auto-save history, so persist pending saves first
+        if request_data.run_type == "submit":
+            await db.run_sync(
+                lambda session: flush_candidate_autosaves(current_candidate.candidate_id, current_candidate.assessment_id, session)
+            )
+        
+        # The submission stays in Redis until the worker persists it with its results
+        ticket = create_submission_job(
             candidate_id=current_candidate.candidate_id,
-            question_id=request_data.question_id,
             assessment_id=current_candidate.assessment_id,
+            question_id=request_data.question_id,
             code=request_data.code,
             language=request_data.language,
-            is_final_submission=(request_data.run_type == "submit"),
-            status=SubmissionStatus.PENDING
+            run_type=request_data.run_type
         )
         
-        db.add(submission)
-        db.commit()
-        db.refresh(submission)
-        
         # Queue the execution job
-        job = job_queue.enqueue(
-            execute_code_async,
-            submission.id,
-            request_data.run_type,
-            job_timeout=settings.CODE_EXECUTION_TIMEOUT + 10
-        )
+        job = enqueue_submission_job(ticket, request_data.run_type)
         
         return {
-            "submission_id": submission.id,
+            "submission_id": ticket,
             "job_id": job.id,
             "status": "queued",
             "message": "Code execution queued successfully"
@@ -314,114 +319,184 @@ async def execute_code(
 
 @router.get("/submission/{submission_id}/status")
 async def get_submission_status(
-    submission_id: int,
-    current_candidate: AssessmentCandidate = Depends(get_current_candidate_from_cookie),
-    db: Session = Depends(get_db)
+    request: Request,
+    submission_id: str,
+    current_candidate: CandidateContext = Depends(get_candidate_context_from_cookie),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    submission = db.query(Submission).filter(
-        Submission.id == submission_id,
-        Submission.candidate_id == current_candidate.candidate_id
-    ).first()
+    # The worker keeps a serialized document in Redis for every state change
+    cached = get_cached_submission_status(submission_id)
     
-    if not submission:
+    if cached is None:
+        # Unknown tickets have expired from Redis; only persisted ids can be looked up
+        if not submission_id.isdigit():
+            raise HTTPException(status_code=404, detail="Submission not found")
+        
+        result = await db.execute(select(Submission).options(
+            selectinload(Submission.results).undefer(SubmissionResult.actual_output)
+        ).where(
+            Submission.id == int(submission_id),
+            Submission.candidate_id == current_candidate.candidate_id
+        ))
+        submission = result.scalars().first()
+        
+        if not submission:
+            raise HTTPException(status_code=404, detail="Submission not found")
+        
+        if submission.status == SubmissionStatus.RUNNING:
+            # Results are only committed at the end; report what has been judged so far
+            partial_results = get_partial_results(submission.id)
+            document = serialize_submission(submission, results=partial_results)
+            document["total_score"] = sum(result["score"] for result in partial_results)
+            return document
+        
+        document = serialize_submission(submission)
+        if document["status"] not in TERMINAL_STATUSES:
+            return document
+        # Finished documents never change again, so they are safe to cache from here
+        cached = cache_submission_status(submission.id, submission.candidate_id, document)
+    
+    elif int(cached["candidate_id"]) != current_candidate.candidate_id:
         raise HTTPException(status_code=404, detail="Submission not found")
     
-    return {
-        "submission_id": submission.id,
-        "status": submission.status.value,
-        "overall_verdict": submission.overall_verdict.value if submission.overall_verdict else None,
-        "total_score": submission.total_score,
-        "execution_time_ms": submission.execution_time_ms,
-        "memory_used_kb": submission.memory_used_kb,
-        "compilation_error": submission.compilation_error,
-        "runtime_error": submission.runtime_error,
-        "results": [
-            {
-                "test_case_id": result.test_case_id,
-                "verdict": result.verdict.value,
-                "execution_time_ms": result.execution_time_ms,
-                "memory_used_kb": result.memory_used_kb,
-                "score": result.score,
-                "actual_output": result.actual_output,
-                "error_message": result.error_message
-            }
-            for result in submission.results
-        ] if submission.results else []
-    }
+    headers = {"ETag": cached["etag"], "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if cached["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=cached["body"], media_type="application/json", headers=headers)
+
+@router.get("/submission/{submission_id}/events")
+async def submission_events(
+    submission_id: str,
+    current_candidate: CandidateContext = Depends(get_candidate_context_from_cookie),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Server-sent events stream of status changes for a submission"""
+    # Ownership is checked once per stream, preferably from the cached state
+    state = await get_submission_state(submission_id)
+    if state:
+        owner_id = state["candidate_id"]
+    elif not submission_id.isdigit():
+        owner_id = None
+    else:
+        owner_id = await db.scalar(select(Submission.candidate_id).where(Submission.id == int(submission_id)))
+    
+    if owner_id != current_candidate.candidate_id:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    # Release the pooled connection; the stream itself never touches the database
+    await db.close()
+
+    async def event_stream():
+        try:
+            async with asyncio.timeout(settings.SUBMISSION_STREAM_TIMEOUT_SECONDS):
+                async for event in stream_submission_events(submission_id):
+                    if event is None:
+                        yield ": keep-alive\n\n"
+                        continue
+                    event.pop("candidate_id", None)
+                    yield f"event: {event['status']}\ndata: {json.dumps(event)}\n\n"
+        except TimeoutError:
+            yield "event: timeout\ndata: {}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.post("/proctoring-event")
 async def log_proctoring_event(
     request: Request,
     event_data: ProctoringEventRequest,
-    current_candidate: AssessmentCandidate = Depends(get_current_candidate_from_cookie),
-    db: Session = Depends(get_db)
+    current_candidate: CandidateContext = Depends(get_candidate_context_from_cookie),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        # Determine if this is a violation based on assessment settings
-        is_violation = False
-        assessment = current_candidate.assessment
-        
-        if event_data.event_type == "copy_paste" and not assessment.allow_copy_paste:
-            is_violation = True
-        elif event_data.event_type == "tab_switch" and not assessment.allow_tab_switching:
-            is_violation = True
-        
-        proctoring_event = ProctoringEvent(
-            candidate_id=current_candidate.candidate_id,
-            assessment_id=current_candidate.assessment_id,
-            event_type=ProctoringEventType(event_data.event_type),
-            event_data=json.dumps(event_data.event_data),
-            severity=event_data.severity,
-            is_violation=is_violation,
+        # Violations are determined by the assessment settings
+        device_id = await db.run_sync(
+            get_device_id,
             user_agent=request.headers.get("user-agent"),
-            ip_address=request.client.host if request.client else None
+            ip_address=request.client.host if request.client else None,
+            screen_resolution=None
         )
+        rows = build_proctoring_rows(
+            [event_data],
+            current_candidate.candidate_id,
+            current_candidate.assessment,
+            device_id=device_id,
+            started_at=current_candidate.started_at
+        )
+        await db.run_sync(insert_proctoring_rows, rows)
         
-        db.add(proctoring_event)
-        db.commit()
-        
-        return {"status": "logged", "is_violation": is_violation}
+        return {"status": "logged", "is_violation": rows[0]["is_violation"]}
         
     except Exception as e:
         logger.error(f"Error logging proctoring event: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to log proctoring event")
 
+@router.post("/proctoring-events")
+async def log_proctoring_events(
+    request: Request,
+    batch: ProctoringEventBatchRequest,
+    current_candidate: CandidateContext = Depends(get_candidate_context_from_cookie),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Log a batch of proctoring events with a single insert"""
+    if len(batch.events) > settings.PROCTORING_BATCH_MAX_EVENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.PROCTORING_BATCH_MAX_EVENTS} events per batch"
+        )
+    
+    invalid = invalid_event_types(batch.events)
+    if invalid:
+        raise HTTPException(
+            status_code=422,
+            detail={"message": "Unknown event types", "invalid_events": invalid}
+        )
+    
+    try:
+        device_id = await db.run_sync(
+            get_device_id,
+            user_agent=request.headers.get("user-agent"),
+            ip_address=request.client.host if request.client else None,
+            screen_resolution=batch.screen_resolution
+        )
+        rows = build_proctoring_rows(
+            batch.events,
+            current_candidate.candidate_id,
+            current_candidate.assessment,
+            device_id=device_id,
+            started_at=current_candidate.started_at
+        )
+        await db.run_sync(insert_proctoring_rows, rows)
+        
+        return {
+            "status": "logged",
+            "logged": len(rows),
+            "violations": sum(1 for row in rows if row["is_violation"])
+        }
+        
+    except Exception as e:
+        logger.error(f"Error logging proctoring events: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to log proctoring events")
+
 @router.post("/auto-save")
 async def auto_save_code(
     save_data: AutoSaveRequest,
-    current_candidate: AssessmentCandidate = Depends(get_current_candidate_from_cookie),
-    db: Session = Depends(get_db)
+    current_candidate: CandidateContext = Depends(get_candidate_context_from_cookie)
 ):
     try:
-        # For now, we'll store the auto-save as a non-final submission
-        # In a production system, you might want a separate auto-save table
-        
-        # Check if there's a recent auto-save submission
-        from datetime import datetime, timedelta
-        recent_autosave = db.query(Submission).filter(
-            Submission.candidate_id == current_candidate.candidate_id,
-            Submission.question_id == save_data.question_id,
-            Submission.is_final_submission == False,
-            Submission.submitted_at > datetime.utcnow() - timedelta(minutes=1)
-        ).first()
-        
-        if recent_autosave:
-            # Update existing auto-save
-            recent_autosave.code = save_data.code
-        else:
-            # Create new auto-save
-            autosave_submission = Submission(
-                candidate_id=current_candidate.candidate_id,
-                question_id=save_data.question_id,
-                assessment_id=current_candidate.assessment_id,
-                code=save_data.code,
-                language="python",  # Default language for auto-save
-                is_final_submission=False,
-                status=SubmissionStatus.PENDING
-            )
-            db.add(autosave_submission)
-        
-        db.commit()
+        # Saves are buffered in Redis; the background flusher writes them in batches
+        buffer_autosave(
+            candidate_id=current_candidate.candidate_id,
+            assessment_id=current_candidate.assessment_id,
+            question_id=save_data.question_id,
+            code=save_data.code,
+            language=save_data.language
+        )
         
         return {"status": "saved"}
         
@@ -431,7 +506,7 @@ async def auto_save_code(
 
 @router.get("/assessment-time-remaining")
 async def get_time_remaining(
-    current_candidate: AssessmentCandidate = Depends(get_current_candidate_from_cookie)
+    current_candidate: CandidateContext = Depends(get_candidate_context_from_cookie)
 ):
     if not current_candidate.started_at:
         return {"time_remaining_minutes": current_candidate.assessment.total_time_minutes}
@@ -1,16 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, Cookie
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import timedelta
+from typing import Optional
 
 from app.core.database import get_db
-from app.core.security import verify_password, create_access_token, get_current_user
+from app.core.security import PasswordHashingBusy, verify_password_async, create_access_token, get_current_user
 from app.core.config import settings
 from app.models.user import User
 from app.models.candidate import Candidate
 from app.models.assessment import AssessmentCandidate
 from app.services.candidate_service import generate_assessment_token
+from app.services.candidate_sessions import create_session, end_session
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -28,7 +30,18 @@ async def login(
 ):
     user = db.query(User).filter(User.email == email).first()
     
-    if not user or not verify_password(password, user.hashed_password):
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await verify_password_async(password, user.hashed_password)
+        except PasswordHashingBusy:
+            return templates.TemplateResponse(
+                "auth/login.html",
+                {"request": request, "error": "Too many sign-ins at once, please try again in a moment"},
+                status_code=503
+            )
+    
+    if not valid:
         return templates.TemplateResponse(
             "auth/login.html", 
             {"request": request, "error": "Invalid email or password"}
@@ -40,6 +53,11 @@ async def login(
             {"request": request, "error": "Account is disabled"}
         )
     
+    # Transparently move the stored hash to the configured work factor
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+    
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
@@ -110,8 +128,9 @@ async def candidate_login(
             }
         )
     
-    # Create session token for candidate
+    # Create session token for candidate; API calls are only accepted with it
     session_token = generate_assessment_token()
+    create_session(session_token, assessment_candidate.id, assessment_candidate.assessment.total_time_minutes * 60)
     
     response = RedirectResponse(
         url=f"/candidate/assessment/{assessment_candidate.id}",
@@ -139,7 +158,9 @@ async def logout():
     return response
 
 @router.post("/candidate-logout")
-async def candidate_logout():
+async def candidate_logout(candidate_session: Optional[str] = Cookie(None)):
+    if candidate_session:
+        end_session(candidate_session)
     response = RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
     response.delete_cookie("candidate_session")
     response.delete_cookie("assessment_candidate_id")
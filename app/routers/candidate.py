@@ -143,14 +143,22 @@
 #     )
 from fastapi import APIRouter, Depends, Request, HTTPException, Cookie, Path, Query
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import Optional
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.models.assessment import AssessmentCandidate, AssessmentCandidateStatus
 from app.models.submission import Submission
 from app.models.proctoring import ProctoringEvent
+from app.repositories.candidate_pages import (
+    load_assessment_page, load_final_submissions, load_latest_submission, load_question_page
+)
+from app.services.autosave_buffer import get_buffered_autosave
+from app.services.candidate_sessions import CandidateContext, get_candidate_context, is_valid_session
+from app.services.code_history import get_code_version
+from app.utils import to_naive_utc
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -167,6 +175,9 @@ def get_current_candidate_from_cookie(
     
     try:
         candidate_id = int(candidate_cookie_id)
+        if not is_valid_session(candidate_session, candidate_id):
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        
         assessment_candidate = db.query(AssessmentCandidate).filter(
             AssessmentCandidate.id == candidate_id
         ).first()
@@ -177,6 +188,25 @@ def get_current_candidate_from_cookie(
         return assessment_candidate
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid candidate ID")
+
+def get_candidate_context_from_cookie(
+    candidate_cookie_id: Optional[str] = Cookie(None, alias="assessment_candidate_id"),
+    candidate_session: Optional[str] = Cookie(None)
+) -> CandidateContext:
+    """Cached cookie authentication for the candidate API; no database reads on a hit"""
+    if not candidate_cookie_id or not candidate_session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    try:
+        candidate_id = int(candidate_cookie_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid candidate ID")
+    
+    context = get_candidate_context(candidate_session, candidate_id)
+    if not context:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return context
+
 def get_candidate_by_id(
     candidate_id: int,
     db: Session = Depends(get_db)
@@ -193,26 +223,27 @@ def get_candidate_by_id(
     return assessment_candidate
 
 
-async def render_assessment(request: Request, current_candidate: AssessmentCandidate, db: Session):
+async def render_assessment(request: Request, assessment_candidate_id: int, db: AsyncSession):
     """Common function to render assessment page"""
+    # Load the candidate, assessment and questions in one go
+    current_candidate = await db.run_sync(load_assessment_page, assessment_candidate_id)
+    if not current_candidate:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+
     # Update status to in_progress if not already started
     if current_candidate.status == AssessmentCandidateStatus.ASSIGNED:
         current_candidate.status = AssessmentCandidateStatus.IN_PROGRESS
         current_candidate.started_at = datetime.utcnow()
-        db.commit()
+        await db.commit()
 
-    # Get assessment questions
     assessment = current_candidate.assessment
     assessment_questions = assessment.assessment_questions
 
-    # Get candidate's submissions for this assessment
-    submissions = db.query(Submission).filter(
-        Submission.candidate_id == current_candidate.candidate_id,
-        Submission.assessment_id == assessment.id,
-    ).all()
+    # Get candidate's final submissions for this assessment
+    submissions = await db.run_sync(load_final_submissions, current_candidate.candidate_id, assessment.id)
 
     # Create a dict for quick lookup of submissions by question
-    submission_map = {sub.question_id: sub for sub in submissions if sub.is_final_submission}
+    submission_map = {sub.question_id: sub for sub in submissions}
 
     return templates.TemplateResponse(
         "candidate/assessment.html",
@@ -263,42 +294,36 @@ async def render_assessment(request: Request, current_candidate: AssessmentCandi
 async def assessment_interface_with_path(
     request: Request,
     assessment_candidate_id: int = Path(..., description="Assessment candidate ID"),
-    db: Session = Depends(get_db),
-    cookie_candidate: AssessmentCandidate = Depends(get_current_candidate_from_cookie),  # ✅ FIXED
+    db: AsyncSession = Depends(get_async_db),
+    cookie_candidate: CandidateContext = Depends(get_candidate_context_from_cookie),
 ):
     """Assessment interface accessed via URL path parameter"""
-    # Get candidate by path parameter
-    current_candidate = get_candidate_by_id(assessment_candidate_id, db)
-    
     # Ensure path param matches authenticated candidate
-    if cookie_candidate and current_candidate.id != cookie_candidate.id:
+    if assessment_candidate_id != cookie_candidate.id:
         raise HTTPException(status_code=403, detail="Access denied")
 
-    return await render_assessment(request, current_candidate, db)
+    return await render_assessment(request, assessment_candidate_id, db)
 
 
 @router.get("/assessment")
 async def assessment_interface_no_path(
     request: Request,
-    current_candidate: AssessmentCandidate = Depends(get_current_candidate_from_cookie),
-    db: Session = Depends(get_db),
+    current_candidate: CandidateContext = Depends(get_candidate_context_from_cookie),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Assessment interface accessed via cookie authentication only"""
-    return await render_assessment(request, current_candidate, db)
+    return await render_assessment(request, current_candidate.id, db)
 
 @router.get("/question/{question_id}")
 async def question_interface(
     request: Request,
     question_id: int = Path(..., description="Question ID"),
-    current_candidate: AssessmentCandidate = Depends(get_current_candidate_from_cookie),
-    db: Session = Depends(get_db)
+    current_candidate: CandidateContext = Depends(get_candidate_context_from_cookie),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Question interface"""
     # Verify question is part of current assessment
-    assessment_question = next(
-        (aq for aq in current_candidate.assessment.assessment_questions if aq.question_id == question_id),
-        None
-    )
+    current_candidate, assessment_question = await db.run_sync(load_question_page, current_candidate.id, question_id)
     if not assessment_question:
         raise HTTPException(status_code=404, detail="Question not found in assessment")
 
@@ -308,11 +333,25 @@ async def question_interface(
     public_test_cases = [tc for tc in question.test_cases if tc.is_public]
 
     # Get candidate's latest submission for this question
-    latest_submission = db.query(Submission).filter(
-        Submission.candidate_id == current_candidate.candidate_id,
-        Submission.question_id == question_id,
-        Submission.assessment_id == current_candidate.assessment_id
-    ).order_by(Submission.submitted_at.desc()).first()
+    latest_submission = await db.run_sync(
+        load_latest_submission, current_candidate.candidate_id, current_candidate.assessment_id, question_id
+    )
+
+    # The newest of the buffered auto-save, the code history (auto-saves, runs
+    # and submits) and the latest submission wins: the buffer keeps a save for
+    # a day, long after a later run, submit or language switch replaced it
+    autosave = get_buffered_autosave(current_candidate.candidate_id, current_candidate.assessment_id, question_id)
+    snapshot = await db.run_sync(
+        get_code_version, current_candidate.candidate_id, current_candidate.assessment_id, question_id
+    )
+    sources = []
+    if autosave:
+        sources.append((datetime.fromisoformat(autosave["saved_at"]), autosave["code"]))
+    if snapshot and snapshot.created_at:
+        sources.append((to_naive_utc(snapshot.created_at), snapshot.code))
+    if latest_submission and latest_submission.submitted_at:
+        sources.append((to_naive_utc(latest_submission.submitted_at), latest_submission.code))
+    saved_code = max(sources, key=lambda source: source[0])[1] if sources else None
 
     return templates.TemplateResponse(
         "candidate/question.html",
@@ -323,6 +362,7 @@ async def question_interface(
             "assessment_question": assessment_question,
             "public_test_cases": public_test_cases,
             "latest_submission": latest_submission,
+            "autosaved_code": saved_code,
             "candidate": current_candidate.candidate
         }
     )
@@ -339,7 +379,9 @@ async def candidate_results(
         raise HTTPException(status_code=400, detail="Assessment not yet completed")
 
     # Get all final submissions for this assessment
-    submissions = db.query(Submission).filter(
+    submissions = db.query(Submission).options(
+        selectinload(Submission.results)
+    ).filter(
         Submission.candidate_id == current_candidate.candidate_id,
         Submission.assessment_id == current_candidate.assessment_id,
         Submission.is_final_submission == True
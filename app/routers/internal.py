@@ -0,0 +1,25 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.core.config import settings
+from app.core.database import database_pool_stats
+from app.core.security import password_hashing_stats
+
+router = APIRouter()
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """Only monitoring holding INTERNAL_API_TOKEN may read the internal endpoints"""
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not x_internal_token or not secrets.compare_digest(x_internal_token, settings.INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid internal token")
+
+@router.get("/metrics", dependencies=[Depends(require_internal_token)])
+async def internal_metrics():
+    """Runtime metrics of this worker process"""
+    return {
+        "password_hashing": password_hashing_stats(),
+        "database_pools": database_pool_stats()
+    }
@@ -1,7 +1,7 @@
 import asyncio
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 from app.core.config import settings
 from app.models.user import User
 
@@ -20,7 +20,7 @@ async def create_admin_user():
             # Create admin user
             admin_user = User(
                 email=settings.ADMIN_EMAIL,
-                hashed_password=get_password_hash(settings.ADMIN_PASSWORD),
+                hashed_password=await get_password_hash_async(settings.ADMIN_PASSWORD),
                 is_admin=True,
                 is_active=True
             )
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import redis
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.code_history import CodeSnapshotSource
+from app.services.code_history import record_snapshot
+
+logger = logging.getLogger(__name__)
+
+redis_conn = redis.Redis.from_url(settings.REDIS_URL)
+
+# Set of buffer keys holding saves that have not reached the database yet
+DIRTY_KEY = "autosave:dirty"
+# Hash of buffer key -> consecutive failed flushes
+FAILURES_KEY = "autosave:failures"
+# Set of buffer keys taken out of the flush rotation after too many failures;
+# a new save for the candidate puts the key back for one more attempt
+PARKED_KEY = "autosave:parked"
+
+def autosave_key(assessment_id: int, candidate_id: int) -> str:
+    """Hash of question_id -> latest auto-saved code for one candidate"""
+    return f"autosave:{assessment_id}:{candidate_id}"
+
+def flushed_key(key: str) -> str:
+    """Hash of question_id -> saved_at of the last save written to the database"""
+    return f"{key}:flushed"
+
+def buffer_autosave(candidate_id: int, assessment_id: int, question_id: int, code: str, language: str) -> None:
+    """Record the latest code for a question; the flusher persists it later"""
+    key = autosave_key(assessment_id, candidate_id)
+    entry = json.dumps({
+        "code": code,
+        "language": language,
+        "saved_at": datetime.utcnow().isoformat()
+    })
+
+    pipe = redis_conn.pipeline()
+    pipe.hset(key, question_id, entry)
+    pipe.expire(key, settings.AUTOSAVE_BUFFER_TTL_SECONDS)
+    pipe.sadd(DIRTY_KEY, key)
+    pipe.execute()
+
+def get_buffered_autosave(candidate_id: int, assessment_id: int, question_id: int) -> Optional[Dict[str, Any]]:
+    """Return the latest buffered save for a question, flushed or not"""
+    try:
+        entry = redis_conn.hget(autosave_key(assessment_id, candidate_id), question_id)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to read auto-save buffer: {e}")
+        return None
+    return json.loads(entry) if entry else None
+
+def _pending_rows(key: str) -> List[Dict[str, Any]]:
+    """Collect the saves in a buffer that are newer than the last flush"""
+    _, assessment_id, candidate_id = key.split(":")
+    entries = redis_conn.hgetall(key)
+    flushed = redis_conn.hgetall(flushed_key(key))
+
+    rows = []
+    for question_id, raw_entry in entries.items():
+        entry = json.loads(raw_entry)
+        if flushed.get(question_id, b"").decode() == entry["saved_at"]:
+            continue
+        rows.append({
+            "candidate_id": int(candidate_id),
+            "assessment_id": int(assessment_id),
+            "question_id": int(question_id),
+            "code": entry["code"],
+            "language": entry["language"],
+            "saved_at": datetime.fromisoformat(entry["saved_at"])
+        })
+    return rows
+
+def _record_failure(key: str, error: Exception) -> None:
+    """Retry a key that failed to flush on the next pass, or park it"""
+    failures = redis_conn.hincrby(FAILURES_KEY, key, 1)
+    if failures < settings.AUTOSAVE_FLUSH_MAX_ATTEMPTS:
+        logger.warning(f"Failed to flush auto-saves for {key} (attempt {failures}): {error}")
+        redis_conn.sadd(DIRTY_KEY, key)
+        return
+    # The saves stay readable in the buffer until it expires
+    logger.error(f"Parking auto-saves for {key} after {failures} failed flushes: {error}")
+    redis_conn.sadd(PARKED_KEY, key)
+
+def _flush_keys(keys: List[str], db: Session) -> int:
+    rows_by_key = {key: _pending_rows(key) for key in keys}
+    if not any(rows_by_key.values()):
+        return 0
+
+    flushed = {}
+    for key, key_rows in rows_by_key.items():
+        if not key_rows:
+            continue
+        try:
+            # One bad candidate must not roll back the rest of the batch
+            with db.begin_nested():
+                # Saves become versions in the code history, not Submission rows
+                for row in key_rows:
+                    record_snapshot(
+                        db,
+                        row["candidate_id"],
+                        row["assessment_id"],
+                        row["question_id"],
+                        row["code"],
+                        row["language"],
+                        CodeSnapshotSource.AUTOSAVE,
+                        created_at=row["saved_at"]
+                    )
+            flushed[key] = key_rows
+        except Exception as e:
+            _record_failure(key, e)
+
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Put the claimed keys back so the next pass retries them
+        if flushed:
+            redis_conn.sadd(DIRTY_KEY, *flushed)
+        raise
+
+    pipe = redis_conn.pipeline()
+    for key, key_rows in flushed.items():
+        pipe.hdel(FAILURES_KEY, key)
+        pipe.srem(PARKED_KEY, key)
+        pipe.hset(flushed_key(key), mapping={
+            row["question_id"]: row["saved_at"].isoformat() for row in key_rows
+        })
+        pipe.expire(flushed_key(key), settings.AUTOSAVE_BUFFER_TTL_SECONDS)
+    pipe.execute()
+
+    return sum(len(key_rows) for key_rows in flushed.values())
+
+def flush_autosaves(db: Session) -> int:
+    """Persist all buffered saves in batches; returns the number of saves processed"""
+    written = 0
+    while True:
+        # SPOP claims keys atomically, so concurrent flushers never double-write
+        keys = [key.decode() for key in redis_conn.spop(DIRTY_KEY, settings.AUTOSAVE_FLUSH_BATCH_SIZE)]
+        if not keys:
+            return written
+        written += _flush_keys(keys, db)
+
+def flush_candidate_autosaves(candidate_id: int, assessment_id: int, db: Session) -> int:
+    """Persist one candidate's buffered saves right away, e.g. on final submit"""
+    key = autosave_key(assessment_id, candidate_id)
+    # A parked buffer gets one more attempt before the history is closed
+    if not redis_conn.srem(DIRTY_KEY, key) and not redis_conn.srem(PARKED_KEY, key):
+        return 0
+    return _flush_keys([key], db)
+
+def flush_autosaves_now() -> int:
+    """Flush all buffered saves with a dedicated session"""
+    db = SessionLocal()
+    try:
+        return flush_autosaves(db)
+    finally:
+        db.close()
+
+async def run_autosave_flusher() -> None:
+    """Background task persisting buffered saves every AUTOSAVE_FLUSH_INTERVAL_SECONDS"""
+    while True:
+        await asyncio.sleep(settings.AUTOSAVE_FLUSH_INTERVAL_SECONDS)
+        try:
+            written = await asyncio.to_thread(flush_autosaves_now)
+            if written:
+                logger.info(f"Flushed {written} auto-saves")
+        except Exception as e:
+            logger.error(f"Auto-save flush failed: {e}")
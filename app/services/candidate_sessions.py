@@ -0,0 +1,175 @@
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import FrozenSet, Optional
+
+import redis
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.assessment import AssessmentCandidate, AssessmentCandidateStatus, AssessmentQuestion
+
+logger = logging.getLogger(__name__)
+
+redis_conn = redis.Redis.from_url(settings.REDIS_URL)
+
+# Changing any of these makes the cached context of a candidate stale
+CONTEXT_FIELDS = ("status", "started_at", "assessment_id", "candidate_id")
+CHANGED_INFO_KEY = "candidate_sessions:changed"
+
+@dataclass(frozen=True, slots=True)
+class AssessmentSettings:
+    id: int
+    total_time_minutes: int
+    allow_copy_paste: bool
+    allow_tab_switching: bool
+
+@dataclass(frozen=True, slots=True)
+class CandidateContext:
+    """What the candidate API needs about the signed-in assessment candidate"""
+    id: int
+    candidate_id: int
+    assessment_id: int
+    status: AssessmentCandidateStatus
+    started_at: Optional[datetime]
+    question_ids: FrozenSet[int]
+    assessment: AssessmentSettings
+
+def session_key(session_token: str) -> str:
+    """assessment_candidate id a candidate_session cookie was issued for"""
+    return f"candidate:session:{session_token}"
+
+def context_key(assessment_candidate_id: int) -> str:
+    """Serialized CandidateContext of an assessment candidate"""
+    return f"candidate:context:{assessment_candidate_id}"
+
+def create_session(session_token: str, assessment_candidate_id: int, ttl_seconds: int) -> None:
+    """Register a freshly issued candidate_session cookie"""
+    redis_conn.set(session_key(session_token), assessment_candidate_id, ex=max(ttl_seconds, 1))
+
+def end_session(session_token: str) -> None:
+    """Forget a candidate_session cookie, e.g. on logout"""
+    redis_conn.delete(session_key(session_token))
+
+def is_valid_session(session_token: str, assessment_candidate_id: int) -> bool:
+    """Whether the cookie pair belongs to a session created at login"""
+    owner = redis_conn.get(session_key(session_token))
+    return owner is not None and int(owner) == assessment_candidate_id
+
+def _serialize(context: CandidateContext) -> str:
+    return json.dumps({
+        "id": context.id,
+        "candidate_id": context.candidate_id,
+        "assessment_id": context.assessment_id,
+        "status": context.status.name,
+        "started_at": context.started_at.isoformat() if context.started_at else None,
+        "question_ids": sorted(context.question_ids),
+        "assessment": {
+            "id": context.assessment.id,
+            "total_time_minutes": context.assessment.total_time_minutes,
+            "allow_copy_paste": context.assessment.allow_copy_paste,
+            "allow_tab_switching": context.assessment.allow_tab_switching
+        }
+    })
+
+def _deserialize(raw: bytes) -> CandidateContext:
+    data = json.loads(raw)
+    return CandidateContext(
+        id=data["id"],
+        candidate_id=data["candidate_id"],
+        assessment_id=data["assessment_id"],
+        status=AssessmentCandidateStatus[data["status"]],
+        started_at=datetime.fromisoformat(data["started_at"]) if data["started_at"] else None,
+        question_ids=frozenset(data["question_ids"]),
+        assessment=AssessmentSettings(**data["assessment"])
+    )
+
+def _load_context(db: Session, assessment_candidate_id: int) -> Optional[CandidateContext]:
+    assessment_candidate = db.query(AssessmentCandidate).options(
+        joinedload(AssessmentCandidate.assessment)
+    ).filter(
+        AssessmentCandidate.id == assessment_candidate_id
+    ).first()
+    if not assessment_candidate:
+        return None
+
+    assessment = assessment_candidate.assessment
+    question_ids = db.query(AssessmentQuestion.question_id).filter(
+        AssessmentQuestion.assessment_id == assessment.id
+    ).all()
+    return CandidateContext(
+        id=assessment_candidate.id,
+        candidate_id=assessment_candidate.candidate_id,
+        assessment_id=assessment_candidate.assessment_id,
+        status=assessment_candidate.status,
+        started_at=assessment_candidate.started_at,
+        question_ids=frozenset(question_id for question_id, in question_ids),
+        assessment=AssessmentSettings(
+            id=assessment.id,
+            total_time_minutes=assessment.total_time_minutes,
+            allow_copy_paste=bool(assessment.allow_copy_paste),
+            allow_tab_switching=bool(assessment.allow_tab_switching)
+        )
+    )
+
+def get_candidate_context(session_token: str, assessment_candidate_id: int) -> Optional[CandidateContext]:
+    """Resolve a candidate's cookies to their context.
+
+    Returns None when the session is unknown or belongs to another candidate.
+    The session check and the cached context are a single Redis round trip;
+    only a cache miss reads the database.
+    """
+    pipe = redis_conn.pipeline(transaction=False)
+    pipe.get(session_key(session_token))
+    pipe.get(context_key(assessment_candidate_id))
+    owner, cached = pipe.execute()
+
+    if owner is None or int(owner) != assessment_candidate_id:
+        return None
+    if cached is not None:
+        return _deserialize(cached)
+
+    db = SessionLocal()
+    try:
+        context = _load_context(db, assessment_candidate_id)
+    finally:
+        db.close()
+    if context:
+        redis_conn.set(context_key(assessment_candidate_id), _serialize(context),
+                       ex=settings.CANDIDATE_CONTEXT_TTL_SECONDS)
+    return context
+
+def invalidate_context(*assessment_candidate_ids: int) -> None:
+    """Drop cached contexts; the next API call reloads them"""
+    if assessment_candidate_ids:
+        redis_conn.delete(*[context_key(assessment_candidate_id) for assessment_candidate_id in assessment_candidate_ids])
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_candidates(session, flush_context):
+    """Remember assessment candidates whose cached context a commit will make stale"""
+    changed = session.info.setdefault(CHANGED_INFO_KEY, set())
+    for instance in session.deleted:
+        if isinstance(instance, AssessmentCandidate):
+            changed.add(instance.id)
+    for instance in session.dirty:
+        if isinstance(instance, AssessmentCandidate):
+            state = inspect(instance)
+            if any(state.attrs[field].history.has_changes() for field in CONTEXT_FIELDS):
+                changed.add(instance.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_candidates(session):
+    changed = session.info.pop(CHANGED_INFO_KEY, None)
+    if not changed:
+        return
+    try:
+        invalidate_context(*changed)
+    except Exception as e:
+        logger.warning(f"Failed to invalidate candidate contexts {sorted(changed)}: {e}")
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_candidates(session):
+    session.info.pop(CHANGED_INFO_KEY, None)
@@ -5,11 +5,21 @@ import time
 import signal
 from typing import Dict, Any, List, Tuple
 import logging
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from app.core.database import SessionLocal
 from app.models.submission import Submission, SubmissionResult, SubmissionStatus, VerdictType
-from app.models.question import TestCase
+from app.models.question import Question, TestCase
+from app.models.assessment import AssessmentQuestion, AssessmentCandidate
+from app.models.code_history import CodeSnapshotSource
+from app.services.code_history import record_snapshot
 from app.core.config import settings
+from app.services.submission_events import publish_submission_document, publish_partial_result
+from app.services.submission_jobs import (
+    load_submission_job,
+    start_submission_job,
+    finish_submission_job,
+    build_submission,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -202,33 +212,42 @@ class CodeExecutor:
         match = re.search(pattern, code)
         return match.group(1) if match else "Solution"
 
-def execute_code_async(submission_id: int, run_type: str = "test"):
-    """Async function to execute code for a submission (used by RQ worker)"""
-    db: Session = SessionLocal()
+def execute_code_async(ticket: str, run_type: str = "test"):
+    """Async function to execute code for a submission ticket (used by RQ worker).
+
+    Pending and running states only live in Redis; the Submission and all of
+    its SubmissionResult rows are written in a single transaction at the end.
+    """
+    db: Session = SessionLocal(expire_on_commit=False)
     executor = CodeExecutor()
+    submission = None
     
     try:
-        # Get submission
-        submission = db.query(Submission).filter(Submission.id == submission_id).first()
-        if not submission:
-            logger.error(f"Submission {submission_id} not found")
+        job = load_submission_job(ticket)
+        if not job:
+            logger.error(f"Submission {ticket} not found")
             return
         
+        start_submission_job(ticket)
+        
         # Update status to running
-        submission.status = SubmissionStatus.RUNNING
-        db.commit()
+        submission = build_submission(job, SubmissionStatus.RUNNING)
+        publish_submission_document(ticket, submission)
         
         # Get question and test cases
-        question = None
-        for aq in submission.candidate.assessment_candidates[0].assessment.assessment_questions:
-            if aq.question_id == submission.question_id:
-                question = aq.question
-                break
+        question = db.query(Question).options(
+            selectinload(Question.test_cases).undefer_group("io")
+        ).join(
+            AssessmentQuestion, AssessmentQuestion.question_id == Question.id
+        ).filter(
+            Question.id == submission.question_id,
+            AssessmentQuestion.assessment_id == submission.assessment_id
+        ).first()
         
         if not question:
             submission.status = SubmissionStatus.ERROR
             submission.runtime_error = "Question not found"
-            db.commit()
+            persist_submission(ticket, submission, db)
             return
         
         # Get test cases (public for testing, all for submission)
@@ -240,13 +259,14 @@ def execute_code_async(submission_id: int, run_type: str = "test"):
         if not test_cases:
             submission.status = SubmissionStatus.ERROR
             submission.runtime_error = "No test cases found"
-            db.commit()
+            persist_submission(ticket, submission, db)
             return
         
         # Execute against each test case
         total_score = 0.0
         total_weight = sum(tc.weight for tc in test_cases)
         overall_verdict = VerdictType.OK
+        partial_results = []
         
         for test_case in test_cases:
             result = executor.execute_code(
@@ -277,9 +297,8 @@ def execute_code_async(submission_id: int, run_type: str = "test"):
             
             total_score += score
             
-            # Save test case result
-            submission_result = SubmissionResult(
-                submission_id=submission.id,
+            # Keep the test case result in memory until the final write
+            submission.results.append(SubmissionResult(
                 test_case_id=test_case.id,
                 verdict=verdict,
                 execution_time_ms=result["execution_time_ms"],
@@ -287,8 +306,17 @@ def execute_code_async(submission_id: int, run_type: str = "test"):
                 score=score,
                 actual_output=result["output"],
                 error_message=result["error"]
-            )
-            db.add(submission_result)
+            ))
+            
+            # Let the candidate follow judging progress before the final commit
+            partial_results.append({
+                "test_case_id": test_case.id,
+                "verdict": verdict.value,
+                "execution_time_ms": result["execution_time_ms"],
+                "memory_used_kb": result["memory_used_kb"],
+                "score": score
+            })
+            publish_partial_result(ticket, submission, partial_results, len(test_cases), total_score)
         
         # Update submission
         submission.status = SubmissionStatus.COMPLETED
@@ -296,28 +324,58 @@ def execute_code_async(submission_id: int, run_type: str = "test"):
         submission.total_score = total_score
         submission.executed_at = submission.submitted_at
         
-        db.commit()
+        persist_submission(ticket, submission, db)
         
-        # Update assessment candidate score if this is a final submission
-        if submission.is_final_submission:
-            from app.services.candidate_service import calculate_assessment_score
-            assessment_candidate = db.query(AssessmentCandidate).filter(
-                AssessmentCandidate.candidate_id == submission.candidate_id,
-                AssessmentCandidate.assessment_id == submission.assessment_id
-            ).first()
-            
-            if assessment_candidate:
-                calculate_assessment_score(assessment_candidate, db)
-        
-        logger.info(f"Code execution completed for submission {submission_id}")
+        logger.info(f"Code execution completed for submission {ticket}")
         
     except Exception as e:
-        logger.error(f"Error executing code for submission {submission_id}: {e}")
+        logger.error(f"Error executing code for submission {ticket}: {e}")
+        db.rollback()
         if submission:
             submission.status = SubmissionStatus.ERROR
             submission.runtime_error = str(e)
-            db.commit()
+            submission.results = []
+            persist_submission(ticket, submission, db)
     
     finally:
         executor.cleanup()
-        db.close()
\ No newline at end of file
+        db.close()
+
+def persist_submission(ticket: str, submission: Submission, db: Session):
+    """Write a judged submission and its results in one transaction, then publish it"""
+    # Runs and submits are versions of the code history too
+    try:
+        with db.begin_nested():
+            record_snapshot(
+                db,
+                submission.candidate_id,
+                submission.assessment_id,
+                submission.question_id,
+                submission.code,
+                submission.language,
+                CodeSnapshotSource.SUBMIT if submission.is_final_submission else CodeSnapshotSource.RUN,
+                created_at=submission.submitted_at
+            )
+    except Exception as e:
+        logger.warning(f"Failed to record code snapshot for submission {ticket}: {e}")
+    
+    db.add(submission)
+    
+    # Final submissions update the candidate's score in the same transaction
+    if submission.is_final_submission and submission.status == SubmissionStatus.COMPLETED:
+        from app.services.candidate_service import calculate_assessment_score
+        db.flush()
+        assessment_candidate = db.query(AssessmentCandidate).filter(
+            AssessmentCandidate.candidate_id == submission.candidate_id,
+            AssessmentCandidate.assessment_id == submission.assessment_id
+        ).first()
+        
+        if assessment_candidate:
+            calculate_assessment_score(assessment_candidate, db)
+    
+    # The session does not expire on commit, so the results built above,
+    # actual_output included, stay loaded for the published document
+    db.commit()
+    
+    publish_submission_document(ticket, submission)
+    finish_submission_job(ticket)
@@ -0,0 +1,164 @@
+import json
+import zlib
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import List, Optional, Union
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.code_history import CodeSnapshot, CodeSnapshotSource
+
+# A delta is a list of operations applied to the keyframe's lines:
+# [start, end] copies keyframe lines start..end, a string inserts new text
+DeltaOp = Union[List[int], str]
+
+def encode_delta(base: str, target: str) -> List[DeltaOp]:
+    """Describe ``target`` as line copies from ``base`` plus inserted text"""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+
+    ops: List[DeltaOp] = []
+    matcher = SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append("".join(target_lines[j1:j2]))
+    return ops
+
+def apply_delta(base: str, ops: List[DeltaOp]) -> str:
+    """Rebuild a version from its keyframe text and delta"""
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return "".join(parts)
+
+def _compress(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"))
+
+def _decompress(payload: bytes) -> str:
+    return zlib.decompress(payload).decode("utf-8")
+
+def _latest_snapshots(db: Session, candidate_id: int, assessment_id: int, question_id: int):
+    """Return the latest snapshot and its keyframe (the same row for keyframes)"""
+    latest = db.query(CodeSnapshot).filter(
+        CodeSnapshot.candidate_id == candidate_id,
+        CodeSnapshot.assessment_id == assessment_id,
+        CodeSnapshot.question_id == question_id
+    ).order_by(CodeSnapshot.version.desc()).first()
+
+    if latest is None or latest.is_keyframe:
+        return latest, latest
+
+    keyframe = db.query(CodeSnapshot).filter(
+        CodeSnapshot.candidate_id == candidate_id,
+        CodeSnapshot.assessment_id == assessment_id,
+        CodeSnapshot.question_id == question_id,
+        CodeSnapshot.version == latest.keyframe_version
+    ).one()
+    return latest, keyframe
+
+def _snapshot_code(snapshot: CodeSnapshot, keyframe: CodeSnapshot) -> str:
+    keyframe_code = _decompress(keyframe.payload)
+    if snapshot.is_keyframe:
+        return keyframe_code
+    return apply_delta(keyframe_code, json.loads(_decompress(snapshot.payload)))
+
+def record_snapshot(db: Session, candidate_id: int, assessment_id: int, question_id: int,
+                    code: str, language: str, source: CodeSnapshotSource,
+                    created_at: Optional[datetime] = None) -> Optional[CodeSnapshot]:
+    """Append a version to a question's code history.
+
+    The snapshot is added to the session but not committed. Returns None
+    when the code and language are unchanged since the latest version.
+    """
+    latest, keyframe = _latest_snapshots(db, candidate_id, assessment_id, question_id)
+
+    if latest is not None:
+        if latest.language == language and _snapshot_code(latest, keyframe) == code:
+            return None
+
+    version = latest.version + 1 if latest else 1
+    snapshot = CodeSnapshot(
+        candidate_id=candidate_id,
+        assessment_id=assessment_id,
+        question_id=question_id,
+        version=version,
+        code_length=len(code),
+        language=language,
+        source=source,
+        created_at=created_at
+    )
+
+    if keyframe is not None and version - keyframe.version < settings.CODE_HISTORY_KEYFRAME_INTERVAL:
+        delta = _compress(json.dumps(encode_delta(_decompress(keyframe.payload), code), separators=(",", ":")))
+        # Start a new keyframe once the delta is no longer much smaller than the text
+        if len(delta) * 2 < len(keyframe.payload):
+            snapshot.payload = delta
+            snapshot.keyframe_version = keyframe.version
+            snapshot.is_keyframe = False
+
+    if snapshot.payload is None:
+        snapshot.payload = _compress(code)
+        snapshot.keyframe_version = version
+        snapshot.is_keyframe = True
+
+    db.add(snapshot)
+    # Flush so a following snapshot for the same question sees this version
+    db.flush()
+    return snapshot
+
+def get_code_version(db: Session, candidate_id: int, assessment_id: int, question_id: int,
+                     version: Optional[int] = None) -> Optional[CodeSnapshot]:
+    """Return a snapshot with its reconstructed ``code`` attribute set.
+
+    Any version is rebuilt from at most two rows: itself and its keyframe.
+    The latest version is returned when ``version`` is None.
+    """
+    if version is None:
+        snapshot, keyframe = _latest_snapshots(db, candidate_id, assessment_id, question_id)
+    else:
+        rows = db.query(CodeSnapshot).filter(
+            CodeSnapshot.candidate_id == candidate_id,
+            CodeSnapshot.assessment_id == assessment_id,
+            CodeSnapshot.question_id == question_id,
+            or_(
+                CodeSnapshot.version == version,
+                CodeSnapshot.version == db.query(CodeSnapshot.keyframe_version).filter(
+                    CodeSnapshot.candidate_id == candidate_id,
+                    CodeSnapshot.assessment_id == assessment_id,
+                    CodeSnapshot.question_id == question_id,
+                    CodeSnapshot.version == version
+                ).scalar_subquery()
+            )
+        ).all()
+        by_version = {row.version: row for row in rows}
+        snapshot = by_version.get(version)
+        keyframe = by_version.get(snapshot.keyframe_version) if snapshot else None
+
+    if snapshot is None:
+        return None
+
+    snapshot.code = _snapshot_code(snapshot, keyframe)
+    return snapshot
+
+def list_code_versions(db: Session, candidate_id: int, assessment_id: int, question_id: int):
+    """Return version metadata for a question's history, oldest first"""
+    return db.query(
+        CodeSnapshot.version,
+        CodeSnapshot.language,
+        CodeSnapshot.source,
+        CodeSnapshot.code_length,
+        CodeSnapshot.is_keyframe,
+        CodeSnapshot.created_at
+    ).filter(
+        CodeSnapshot.candidate_id == candidate_id,
+        CodeSnapshot.assessment_id == assessment_id,
+        CodeSnapshot.question_id == question_id
+    ).order_by(CodeSnapshot.version).all()
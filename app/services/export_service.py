@@ -5,7 +5,9 @@ import pandas as pd
 from sqlalchemy.orm import Session
 from app.models.assessment import AssessmentCandidate, Assessment
 from app.models.submission import Submission
-from app.models.proctoring import ProctoringEvent
+from app.repositories.read_models import (
+    count_passed_test_cases, iter_assessment_results, iter_final_submissions, iter_proctoring_events
+)
 
 def export_results_to_csv(assessment_id: int, db: Session) -> str:
     """Export assessment results to CSV format"""
@@ -15,10 +17,6 @@ def export_results_to_csv(assessment_id: int, db: Session) -> str:
     if not assessment:
         return ""
     
-    results = db.query(AssessmentCandidate).filter(
-        AssessmentCandidate.assessment_id == assessment_id
-    ).all()
-    
     # Create CSV content
     output = io.StringIO()
     writer = csv.writer(output)
@@ -40,12 +38,11 @@ def export_results_to_csv(assessment_id: int, db: Session) -> str:
     ])
     
     # Write data rows
-    for result in results:
-        candidate = result.candidate
+    for result in iter_assessment_results(db, assessment_id):
         writer.writerow([
-            candidate.name,
-            candidate.email,
-            candidate.position,
+            result.candidate_name,
+            result.candidate_email,
+            result.candidate_position,
             result.status.value,
             result.started_at.isoformat() if result.started_at else '',
             result.submitted_at.isoformat() if result.submitted_at else '',
@@ -67,22 +64,17 @@ def export_results_to_excel(assessment_id: int, db: Session) -> io.BytesIO:
     if not assessment:
         return io.BytesIO()
     
-    results = db.query(AssessmentCandidate).filter(
-        AssessmentCandidate.assessment_id == assessment_id
-    ).all()
-    
     # Create Excel writer
     output = io.BytesIO()
     writer = pd.ExcelWriter(output, engine='openpyxl')
     
     # Summary sheet
     summary_data = []
-    for result in results:
-        candidate = result.candidate
+    for result in iter_assessment_results(db, assessment_id):
         summary_data.append({
-            'Candidate Name': candidate.name,
-            'Email': candidate.email,
-            'Position': candidate.position,
+            'Candidate Name': result.candidate_name,
+            'Email': result.candidate_email,
+            'Position': result.candidate_position,
             'Status': result.status.value,
             'Started At': result.started_at.isoformat() if result.started_at else '',
             'Submitted At': result.submitted_at.isoformat() if result.submitted_at else '',
@@ -99,47 +91,29 @@ def export_results_to_excel(assessment_id: int, db: Session) -> io.BytesIO:
     
     # Detailed submissions sheet
     submissions_data = []
-    for result in results:
-        candidate = result.candidate
-        submissions = db.query(Submission).filter(
-            Submission.candidate_id == candidate.id,
-            Submission.assessment_id == assessment_id,
-            Submission.is_final_submission == True
-        ).all()
-        
-        for submission in submissions:
-            question_title = "Unknown"
-            for aq in assessment.assessment_questions:
-                if aq.question_id == submission.question_id:
-                    question_title = aq.question.title
-                    break
-            
-            submissions_data.append({
-                'Candidate Name': candidate.name,
-                'Email': candidate.email,
-                'Question': question_title,
-                'Language': submission.language,
-                'Status': submission.status.value,
-                'Verdict': submission.overall_verdict.value if submission.overall_verdict else '',
-                'Score': submission.total_score,
-                'Execution Time (ms)': submission.execution_time_ms,
-                'Memory Used (KB)': submission.memory_used_kb,
-                'Submitted At': submission.submitted_at.isoformat()
-            })
+    for submission in iter_final_submissions(db, assessment_id):
+        submissions_data.append({
+            'Candidate Name': submission.candidate_name,
+            'Email': submission.candidate_email,
+            'Question': submission.question_title or "Unknown",
+            'Language': submission.language,
+            'Status': submission.status.value,
+            'Verdict': submission.overall_verdict.value if submission.overall_verdict else '',
+            'Score': submission.total_score,
+            'Execution Time (ms)': submission.execution_time_ms,
+            'Memory Used (KB)': submission.memory_used_kb,
+            'Submitted At': submission.submitted_at.isoformat()
+        })
     
     df_submissions = pd.DataFrame(submissions_data)
     df_submissions.to_excel(writer, sheet_name='Submissions', index=False)
     
     # Proctoring events sheet
     proctoring_data = []
-    events = db.query(ProctoringEvent).filter(
-        ProctoringEvent.assessment_id == assessment_id
-    ).all()
-    
-    for event in events:
+    for event in iter_proctoring_events(db, assessment_id):
         proctoring_data.append({
-            'Candidate Name': event.candidate.name,
-            'Email': event.candidate.email,
+            'Candidate Name': event.candidate_name,
+            'Email': event.candidate_email,
             'Event Type': event.event_type.value,
             'Severity': event.severity,
             'Is Violation': event.is_violation,
@@ -197,8 +171,10 @@ def export_candidate_report(candidate_id: int, assessment_id: int, db: Session)
         Submission.is_final_submission == True
     ).all()
     
+    test_case_counts = count_passed_test_cases(db, candidate_id, assessment_id)
     performance_data = []
     for submission in submissions:
+        passed, total = test_case_counts.get(submission.id, (0, 0))
         question_title = "Unknown"
         for aq in assessment.assessment_questions:
             if aq.question_id == submission.question_id:
@@ -211,8 +187,8 @@ def export_candidate_report(candidate_id: int, assessment_id: int, db: Session)
             'Score': submission.total_score,
             'Verdict': submission.overall_verdict.value if submission.overall_verdict else '',
             'Execution Time (ms)': submission.execution_time_ms,
-            'Test Cases Passed': len([r for r in submission.results if r.verdict.value == 'OK']),
-            'Total Test Cases': len(submission.results)
+            'Test Cases Passed': passed,
+            'Total Test Cases': total
         })
     
     df_performance = pd.DataFrame(performance_data)
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import logging
+import secrets
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+import redis
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.proctoring import ProctoringCounter
+
+logger = logging.getLogger(__name__)
+
+redis_conn = redis.Redis.from_url(settings.REDIS_URL)
+
+# Set of assessment ids whose counters changed since the last checkpoint
+DIRTY_KEY = "proctoring:counters:dirty"
+
+# Bookkeeping fields stored next to the "<candidate_id>:<event type>" counters;
+# LOADED_FIELD holds a random epoch, new whenever the hash is rebuilt, so
+# versions counted before a lost hash never match versions counted after it
+VERSION_FIELD = "_version"
+LOADED_FIELD = "_loaded"
+VIOLATIONS = "violations"
+
+def counters_key(assessment_id: int) -> str:
+    """Hash of "<candidate_id>:<event type|violations>" -> count for one assessment"""
+    return f"proctoring:counters:{assessment_id}"
+
+def _ensure_loaded(assessment_id: int) -> None:
+    """Seed the Redis counters from the last checkpoint if they were lost or expired"""
+    key = counters_key(assessment_id)
+    if redis_conn.hexists(key, LOADED_FIELD):
+        return
+    # Only one process wins HSETNX and adds the checkpoint; increments made
+    # meanwhile are for new events and stay on top of it
+    if not redis_conn.hsetnx(key, LOADED_FIELD, secrets.token_hex(8)):
+        return
+
+    db = SessionLocal()
+    try:
+        checkpoints = db.query(ProctoringCounter).filter(
+            ProctoringCounter.assessment_id == assessment_id
+        ).all()
+    finally:
+        db.close()
+
+    pipe = redis_conn.pipeline()
+    for checkpoint in checkpoints:
+        for event_type, count in json.loads(checkpoint.event_counts).items():
+            pipe.hincrby(key, f"{checkpoint.candidate_id}:{event_type}", count)
+        pipe.hincrby(key, f"{checkpoint.candidate_id}:{VIOLATIONS}", checkpoint.violation_count)
+    pipe.expire(key, settings.PROCTORING_COUNTERS_TTL_SECONDS)
+    pipe.execute()
+
+def record_event_counts(rows: List[Dict[str, Any]]) -> None:
+    """Count freshly inserted proctoring rows into the live counters"""
+    increments: Dict[int, Counter] = {}
+    for row in rows:
+        counts = increments.setdefault(row["assessment_id"], Counter())
+        counts[f"{row['candidate_id']}:{row['event_type'].value}"] += 1
+        if row["is_violation"]:
+            counts[f"{row['candidate_id']}:{VIOLATIONS}"] += 1
+
+    for assessment_id, counts in increments.items():
+        _ensure_loaded(assessment_id)
+
+        key = counters_key(assessment_id)
+        pipe = redis_conn.pipeline()
+        for field, count in counts.items():
+            pipe.hincrby(key, field, count)
+        pipe.hincrby(key, VERSION_FIELD, 1)
+        pipe.expire(key, settings.PROCTORING_COUNTERS_TTL_SECONDS)
+        pipe.sadd(DIRTY_KEY, assessment_id)
+        pipe.execute()
+
+def _parse_counters(raw: Dict[bytes, bytes]) -> Tuple[int, Dict[int, Dict[str, Any]]]:
+    version = 0
+    candidates: Dict[int, Dict[str, Any]] = {}
+    for raw_field, raw_count in raw.items():
+        field = raw_field.decode()
+        if field == VERSION_FIELD:
+            version = int(raw_count)
+            continue
+        if field.startswith("_"):
+            continue
+
+        candidate_id, name = field.split(":", 1)
+        entry = candidates.setdefault(int(candidate_id), {"events": {}, "violations": 0, "total": 0})
+        if name == VIOLATIONS:
+            entry["violations"] = int(raw_count)
+        else:
+            entry["events"][name] = int(raw_count)
+            entry["total"] += int(raw_count)
+    return version, candidates
+
+def get_counters(assessment_id: int) -> Tuple[str, Dict[str, Any]]:
+    """Return (revision, document) with the live counters of an assessment.
+
+    The revision is "<epoch>-<version>" and changes whenever the document does.
+    """
+    _ensure_loaded(assessment_id)
+    raw = redis_conn.hgetall(counters_key(assessment_id))
+    version, candidates = _parse_counters(raw)
+    epoch = raw.get(LOADED_FIELD.encode(), b"").decode()
+    by_type = Counter()
+    for entry in candidates.values():
+        by_type.update(entry["events"])
+    return f"{epoch}-{version}", {
+        "assessment_id": assessment_id,
+        "version": version,
+        "totals": {
+            "events": sum(entry["total"] for entry in candidates.values()),
+            "violations": sum(entry["violations"] for entry in candidates.values()),
+            "by_type": dict(by_type)
+        },
+        "candidates": {str(candidate_id): entry for candidate_id, entry in candidates.items()}
+    }
+
+def _checkpoint_assessment(assessment_id: int, db: Session) -> int:
+    _, candidates = _parse_counters(redis_conn.hgetall(counters_key(assessment_id)))
+    if not candidates:
+        return 0
+
+    existing = {
+        checkpoint.candidate_id: checkpoint
+        for checkpoint in db.query(ProctoringCounter).filter(
+            ProctoringCounter.assessment_id == assessment_id
+        ).all()
+    }
+    for candidate_id, entry in candidates.items():
+        checkpoint = existing.get(candidate_id)
+        if checkpoint is None:
+            checkpoint = ProctoringCounter(assessment_id=assessment_id, candidate_id=candidate_id)
+            db.add(checkpoint)
+        checkpoint.event_counts = json.dumps(entry["events"])
+        checkpoint.violation_count = entry["violations"]
+    return len(candidates)
+
+def checkpoint_counters(db: Session) -> int:
+    """Write the counters of every changed assessment to the database"""
+    written = 0
+    while True:
+        assessment_ids = [int(raw) for raw in redis_conn.spop(DIRTY_KEY, 100)]
+        if not assessment_ids:
+            return written
+        try:
+            for assessment_id in assessment_ids:
+                written += _checkpoint_assessment(assessment_id, db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            redis_conn.sadd(DIRTY_KEY, *assessment_ids)
+            raise
+
+def checkpoint_counters_now() -> int:
+    """Checkpoint all changed counters with a dedicated session"""
+    db = SessionLocal()
+    try:
+        return checkpoint_counters(db)
+    finally:
+        db.close()
+
+async def run_counter_checkpointer() -> None:
+    """Background task checkpointing counters every PROCTORING_COUNTERS_CHECKPOINT_SECONDS"""
+    while True:
+        await asyncio.sleep(settings.PROCTORING_COUNTERS_CHECKPOINT_SECONDS)
+        try:
+            written = await asyncio.to_thread(checkpoint_counters_now)
+            if written:
+                logger.info(f"Checkpointed proctoring counters for {written} candidates")
+        except Exception as e:
+            logger.error(f"Proctoring counter checkpoint failed: {e}")
@@ -0,0 +1,128 @@
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+redis_conn = redis.Redis.from_url(settings.REDIS_URL)
+
+# Weights of the decayed signals in the suspicion score
+TAB_SWITCH_WEIGHT = 1.0
+TAB_BURST_SIZE = 3  # Tab switches beyond this within the window weigh progressively more
+PASTE_WEIGHT = 1.5
+FOCUS_LOSS_WEIGHT = 2.0  # Per minute away from the assessment
+
+# Events that take the candidate away from / back to the assessment
+FOCUS_LOST = {"tab_switch", "window_blur"}
+FOCUS_GAINED = {"window_focus"}
+
+def score_key(assessment_id: int, candidate_id: int) -> str:
+    """Hash with the decayed signals and score of one candidate"""
+    return f"proctoring:score:{assessment_id}:{candidate_id}"
+
+def alerts_key(assessment_id: int) -> str:
+    """Capped list of high-severity alerts for an assessment, newest first"""
+    return f"proctoring:alerts:{assessment_id}"
+
+def _load_state(raw: Dict[bytes, bytes]) -> Dict[str, Optional[float]]:
+    state = {"tab": 0.0, "paste": 0.0, "away": 0.0, "last_ts": None, "away_since": None, "alerted_at": None}
+    for key, value in raw.items():
+        state[key.decode()] = float(value) if value else None
+    return state
+
+def _score(state: Dict[str, Optional[float]]) -> float:
+    tab = state["tab"]
+    return (
+        TAB_SWITCH_WEIGHT * tab * max(1.0, tab / TAB_BURST_SIZE)
+        + PASTE_WEIGHT * state["paste"]
+        + FOCUS_LOSS_WEIGHT * state["away"] / 60
+    )
+
+def apply_event(state: Dict[str, Optional[float]], event_type: str, event_data: Dict[str, Any], ts: float) -> None:
+    """Fold one event into the state in O(1).
+
+    Signals decay exponentially with PROCTORING_SCORE_HALF_LIFE_SECONDS, so the
+    score reflects a sliding window without keeping the events themselves.
+    """
+    last_ts = state["last_ts"]
+    if last_ts is not None and ts > last_ts:
+        decay = 0.5 ** ((ts - last_ts) / settings.PROCTORING_SCORE_HALF_LIFE_SECONDS)
+        state["tab"] *= decay
+        state["paste"] *= decay
+        state["away"] *= decay
+    # Out-of-order events are applied without decay
+    state["last_ts"] = max(ts, last_ts or ts)
+
+    if event_type == "tab_switch":
+        state["tab"] += 1
+    elif event_type == "copy_paste" and (event_data or {}).get("action") == "paste":
+        state["paste"] += 1
+
+    if event_type in FOCUS_LOST and state["away_since"] is None:
+        state["away_since"] = ts
+    elif event_type in FOCUS_GAINED and state["away_since"] is not None:
+        state["away"] += max(0.0, ts - state["away_since"])
+        state["away_since"] = None
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def score_events(rows: List[Dict[str, Any]]) -> None:
+    """Update the suspicion scores with freshly inserted proctoring rows"""
+    by_candidate: Dict[tuple, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_candidate.setdefault((row["assessment_id"], row["candidate_id"]), []).append(row)
+
+    for (assessment_id, candidate_id), candidate_rows in by_candidate.items():
+        candidate_rows.sort(key=lambda row: row["timestamp"])
+        key = score_key(assessment_id, candidate_id)
+
+        def update(pipe):
+            state = _load_state(pipe.hgetall(key))
+            for row in candidate_rows:
+                apply_event(state, row["event_type"].value, row["event_data"], _timestamp(row["timestamp"]))
+            score = _score(state)
+
+            alert = None
+            cooldown_over = (
+                state["alerted_at"] is None
+                or state["last_ts"] - state["alerted_at"] >= settings.PROCTORING_SCORE_ALERT_COOLDOWN_SECONDS
+            )
+            if score >= settings.PROCTORING_SCORE_ALERT_THRESHOLD and cooldown_over:
+                state["alerted_at"] = state["last_ts"]
+                alert = {
+                    "candidate_id": candidate_id,
+                    "severity": "high",
+                    "score": round(score, 2),
+                    "signals": {
+                        "tab_switches": round(state["tab"], 2),
+                        "pastes": round(state["paste"], 2),
+                        "focus_loss_seconds": round(state["away"], 1)
+                    },
+                    "at": datetime.fromtimestamp(state["last_ts"], timezone.utc).isoformat()
+                }
+
+            state["score"] = score
+            pipe.multi()
+            pipe.hset(key, mapping={
+                field: "" if value is None else value for field, value in state.items()
+            })
+            pipe.expire(key, settings.PROCTORING_COUNTERS_TTL_SECONDS)
+            if alert:
+                pipe.lpush(alerts_key(assessment_id), json.dumps(alert))
+                pipe.ltrim(alerts_key(assessment_id), 0, settings.PROCTORING_ALERT_FEED_SIZE - 1)
+                pipe.expire(alerts_key(assessment_id), settings.PROCTORING_COUNTERS_TTL_SECONDS)
+
+        # WATCH/MULTI keeps concurrent batches of one candidate from losing updates
+        redis_conn.transaction(update, key)
+
+def get_alerts(assessment_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+    """Latest high-severity alerts of an assessment"""
+    return [json.loads(raw) for raw in redis_conn.lrange(alerts_key(assessment_id), 0, limit - 1)]
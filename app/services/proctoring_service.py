@@ -0,0 +1,292 @@
+import base64
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from sqlalchemy import and_, event, insert, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.core.database import ReplicaSessionLocal
+from app.models.assessment import Assessment
+from app.models.proctoring import ProctoringEvent, ProctoringEventType, ProctoringDevice
+from app.services.candidate_sessions import AssessmentSettings
+from app.services.proctoring_counters import record_event_counts
+from app.services.proctoring_scorer import score_events
+
+logger = logging.getLogger(__name__)
+
+VALID_EVENT_TYPES = {event_type.value for event_type in ProctoringEventType}
+
+# fingerprint -> proctoring_devices.id; device rows are never updated
+_device_ids: Dict[str, int] = {}
+DEVICE_CACHE_SIZE = 10000
+# Device ids looked up in a session's transaction, cached once it commits
+PENDING_DEVICES_INFO_KEY = "proctoring:pending_devices"
+
+def is_violation(assessment: Union[Assessment, AssessmentSettings], event_type: str) -> bool:
+    """Whether an event breaks the assessment's proctoring settings"""
+    if event_type == "copy_paste" and not assessment.allow_copy_paste:
+        return True
+    if event_type == "tab_switch" and not assessment.allow_tab_switching:
+        return True
+    return False
+
+def invalid_event_types(events: List[Any]) -> Dict[int, str]:
+    """Return {index: event_type} for the events with an unknown type"""
+    return {
+        index: event.event_type
+        for index, event in enumerate(events)
+        if event.event_type not in VALID_EVENT_TYPES
+    }
+
+def get_device_id(db: Session, user_agent: Optional[str], ip_address: Optional[str],
+                  screen_resolution: Optional[str]) -> int:
+    """Return the id of the device row for this browser/system info, creating it if needed"""
+    fingerprint = ProctoringDevice.fingerprint_of(user_agent, ip_address, screen_resolution)
+    device_id = _device_ids.get(fingerprint)
+    if device_id is None:
+        device_id = db.info.get(PENDING_DEVICES_INFO_KEY, {}).get(fingerprint)
+    if device_id is not None:
+        return device_id
+
+    values = {
+        "fingerprint": fingerprint,
+        "user_agent": user_agent,
+        "ip_address": ip_address,
+        "screen_resolution": screen_resolution
+    }
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    # Concurrent requests from the same device may race to create the row
+    db.execute(dialect.insert(ProctoringDevice).values(values).on_conflict_do_nothing(index_elements=["fingerprint"]))
+    device_id = db.query(ProctoringDevice.id).filter(ProctoringDevice.fingerprint == fingerprint).scalar()
+
+    # A rollback would drop a freshly inserted row, so only cache committed ids
+    db.info.setdefault(PENDING_DEVICES_INFO_KEY, {})[fingerprint] = device_id
+    return device_id
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_devices(session):
+    pending = session.info.pop(PENDING_DEVICES_INFO_KEY, None)
+    if not pending:
+        return
+    if len(_device_ids) + len(pending) > DEVICE_CACHE_SIZE:
+        _device_ids.clear()
+    _device_ids.update(pending)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending_devices(session):
+    session.info.pop(PENDING_DEVICES_INFO_KEY, None)
+
+def build_proctoring_rows(events: List[Any], candidate_id: int, assessment: Union[Assessment, AssessmentSettings],
+                          device_id: Optional[int], started_at: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Turn validated event payloads into proctoring_events rows"""
+    now = datetime.now(timezone.utc)
+    # Client clocks are not trusted: a timestamp must fall between the start of
+    # the attempt (or PROCTORING_MAX_EVENT_AGE_SECONDS ago) and now
+    not_before = now - timedelta(seconds=settings.PROCTORING_MAX_EVENT_AGE_SECONDS)
+    if started_at is not None:
+        if started_at.tzinfo is None:
+            started_at = started_at.replace(tzinfo=timezone.utc)
+        not_before = max(not_before, min(started_at, now))
+
+    rows = []
+    for event in events:
+        timestamp = event.timestamp or now
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        if not not_before <= timestamp <= now:
+            timestamp = now
+        rows.append({
+            "candidate_id": candidate_id,
+            "assessment_id": assessment.id,
+            "event_type": ProctoringEventType(event.event_type),
+            "event_data": event.event_data,
+            "severity": event.severity,
+            "is_violation": is_violation(assessment, event.event_type),
+            "device_id": device_id,
+            "timestamp": timestamp
+        })
+    return rows
+
+def insert_proctoring_rows(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Write all rows with a single multi-row INSERT, commit and count them"""
+    if not rows:
+        return
+    db.execute(insert(ProctoringEvent).values(rows))
+    db.commit()
+
+    # The events are stored; failures below only leave the live views behind
+    try:
+        record_event_counts(rows)
+    except Exception as e:
+        logger.warning(f"Failed to update proctoring counters: {e}")
+
+    try:
+        score_events(rows)
+    except Exception as e:
+        logger.warning(f"Failed to update proctoring scores: {e}")
+
+def encode_cursor(event: ProctoringEvent) -> str:
+    """Opaque cursor pointing just after ``event`` in (timestamp, id) order"""
+    raw = f"{event.timestamp.isoformat()}|{event.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    timestamp, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(timestamp), int(event_id)
+
+def get_proctoring_page(db: Session, assessment_id: int, limit: int, cursor: Optional[str] = None,
+                        candidate_id: Optional[int] = None, event_type: Optional[ProctoringEventType] = None,
+                        violations_only: bool = False) -> Tuple[List[ProctoringEvent], Optional[str]]:
+    """Return one page of events, newest first, and the cursor of the next page.
+
+    Keyset pagination on (timestamp, id): every page is an index range scan
+    of ``limit`` rows, however deep it is.
+    """
+    query = db.query(ProctoringEvent).options(
+        joinedload(ProctoringEvent.candidate),
+        joinedload(ProctoringEvent.device)
+    ).filter(
+        ProctoringEvent.assessment_id == assessment_id
+    )
+
+    if candidate_id is not None:
+        query = query.filter(ProctoringEvent.candidate_id == candidate_id)
+    if event_type is not None:
+        query = query.filter(ProctoringEvent.event_type == event_type)
+    if violations_only:
+        query = query.filter(ProctoringEvent.is_violation == True)
+
+    if cursor:
+        timestamp, event_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            ProctoringEvent.timestamp < timestamp,
+            and_(ProctoringEvent.timestamp == timestamp, ProctoringEvent.id < event_id)
+        ))
+
+    # One extra row tells whether there is a next page
+    events = query.order_by(
+        ProctoringEvent.timestamp.desc(),
+        ProctoringEvent.id.desc()
+    ).limit(limit + 1).all()
+
+    if len(events) > limit:
+        return events[:limit], encode_cursor(events[limit - 1])
+    return events, None
+
+TIMELINE_CHUNK_SIZE = 1000
+SEVERITIES = ["low", "medium", "high"]
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+def _epoch_ms(timestamp: datetime) -> int:
+    """Whole milliseconds since the epoch; naive timestamps are taken as UTC"""
+    epoch = datetime(1970, 1, 1, tzinfo=timestamp.tzinfo and timezone.utc)
+    return (timestamp - epoch) // timedelta(milliseconds=1)
+
+def _timeline_parts(assessment_id: int, candidate_id: int) -> Iterator[str]:
+    """JSON text of a candidate's timeline, one chunk of events at a time.
+
+    Each event is [ms since previous event, event type index, violation,
+    severity index, device index, event_data]; the first delta is relative
+    to ``start``. Devices are listed once at the end.
+    """
+    event_types = [event_type.value for event_type in ProctoringEventType]
+    type_index = {event_type: index for index, event_type in enumerate(ProctoringEventType)}
+    device_index: Dict[int, int] = {}
+
+    db = ReplicaSessionLocal()
+    try:
+        # Served by ix_proctoring_events_assessment_candidate_timestamp
+        rows = db.query(
+            ProctoringEvent.timestamp,
+            ProctoringEvent.event_type,
+            ProctoringEvent.is_violation,
+            ProctoringEvent.severity,
+            ProctoringEvent.device_id,
+            ProctoringEvent.event_data
+        ).filter(
+            ProctoringEvent.assessment_id == assessment_id,
+            ProctoringEvent.candidate_id == candidate_id
+        ).order_by(
+            ProctoringEvent.timestamp,
+            ProctoringEvent.id
+        ).yield_per(TIMELINE_CHUNK_SIZE)
+
+        previous_ms = None
+        chunk = []
+        separator = ""
+        for timestamp, event_type, violation, severity, device_id, event_data in rows:
+            ms = _epoch_ms(timestamp)
+            if previous_ms is None:
+                previous_ms = ms
+                yield _dumps({
+                    "assessment_id": assessment_id,
+                    "candidate_id": candidate_id,
+                    "start": timestamp.isoformat(),
+                    "event_types": event_types,
+                    "severities": SEVERITIES
+                })[:-1] + ',"events":['
+
+            if device_id not in device_index:
+                device_index[device_id] = len(device_index)
+
+            # Deltas of truncated epoch ms add up exactly, unlike truncated deltas
+            chunk.append(_dumps([
+                ms - previous_ms,
+                type_index[event_type],
+                int(bool(violation)),
+                SEVERITIES.index(severity) if severity in SEVERITIES else 1,
+                device_index[device_id],
+                event_data or None
+            ]))
+            previous_ms = ms
+
+            if len(chunk) >= TIMELINE_CHUNK_SIZE:
+                yield separator + ",".join(chunk)
+                chunk = []
+                separator = ","
+
+        if previous_ms is None:
+            yield _dumps({"assessment_id": assessment_id, "candidate_id": candidate_id, "start": None,
+                          "event_types": event_types, "severities": SEVERITIES, "events": [], "devices": []})
+            return
+
+        devices = {
+            device.id: device
+            for device in db.query(ProctoringDevice).filter(
+                ProctoringDevice.id.in_([device_id for device_id in device_index if device_id is not None])
+            )
+        }
+        device_list = [
+            {
+                "user_agent": devices[device_id].user_agent,
+                "ip_address": devices[device_id].ip_address,
+                "screen_resolution": devices[device_id].screen_resolution
+            } if device_id in devices else None
+            for device_id in device_index
+        ]
+        tail = separator + ",".join(chunk) if chunk else ""
+        yield tail + '],"devices":' + _dumps(device_list) + "}"
+    finally:
+        db.close()
+
+def stream_candidate_timeline(assessment_id: int, candidate_id: int, compress: bool = True) -> Iterator[bytes]:
+    """Timeline of one candidate, streamed as it is read and gzip-compressed unless ``compress`` is off"""
+    if not compress:
+        for part in _timeline_parts(assessment_id, candidate_id):
+            yield part.encode("utf-8")
+        return
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+    for part in _timeline_parts(assessment_id, candidate_id):
+        data = compressor.compress(part.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,179 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import redis
+from rq import Queue
+from sqlalchemy import delete, text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.core.database import writer_engine
+from app.models.proctoring import ProctoringEvent
+
+logger = logging.getLogger(__name__)
+
+redis_conn = redis.Redis.from_url(settings.REDIS_URL)
+job_queue = Queue('default', connection=redis_conn)
+
+PARENT_TABLE = "proctoring_events"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+MAINTENANCE_LOCK_KEY = "proctoring:maintenance:scheduled"
+MAINTENANCE_FUNCTION = "app.services.proctoring_storage.maintain_proctoring_storage"
+
+# On PostgreSQL proctoring_events is range-partitioned by month on `timestamp`.
+# Retention drops expired monthly partitions and deletes expired rows from the
+# DEFAULT partition, which catches timestamps outside every monthly range.
+# SQLite has no partitioning; there the table is append-only and retention
+# deletes whole months through the timestamp index.
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def add_months(moment: datetime, months: int) -> datetime:
+    month_index = moment.month - 1 + months
+    return moment.replace(year=moment.year + month_index // 12, month=month_index % 12 + 1)
+
+def partition_name(start: datetime) -> str:
+    """Name of the monthly partition starting at ``start``"""
+    return f"{PARENT_TABLE}_y{start.year}m{start.month:02d}"
+
+def partition_start(name: str) -> datetime:
+    """Inverse of partition_name"""
+    suffix = name[len(PARENT_TABLE) + 2:]
+    year, month = suffix.split("m")
+    return datetime(int(year), int(month), 1, tzinfo=timezone.utc)
+
+def is_partitioned(connection: Connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    relkind = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": PARENT_TABLE}
+    ).scalar()
+    return relkind == "p"
+
+def list_partitions(connection: Connection) -> List[str]:
+    """Monthly partitions of proctoring_events (the default partition excluded)"""
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": PARENT_TABLE}).scalars().all()
+    return sorted(name for name in names if name.startswith(f"{PARENT_TABLE}_y"))
+
+def has_default_partition(connection: Connection) -> bool:
+    return connection.execute(
+        text("SELECT to_regclass(:table) IS NOT NULL"),
+        {"table": DEFAULT_PARTITION}
+    ).scalar()
+
+def create_partition(connection: Connection, start: datetime) -> None:
+    """Create the partition of a month, adopting its rows from the default partition"""
+    name = partition_name(start)
+    end = add_months(start, 1)
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    window = {"start": start, "end": end}
+
+    stranded = has_default_partition(connection) and connection.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end)"
+    ), window).scalar()
+    if not stranded:
+        connection.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} {bounds}"))
+        return
+
+    # Maintenance missed the month, so its rows went to the default partition and
+    # PostgreSQL refuses the new partition until they are moved out of it
+    logger.warning(f"Moving {name} rows out of {DEFAULT_PARTITION}")
+    connection.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    connection.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} {bounds}"))
+    connection.execute(text(
+        f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end"
+    ), window)
+    connection.execute(text(
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end"
+    ), window)
+    connection.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+def ensure_partitions(connection: Connection, now: datetime = None) -> int:
+    """Create partitions for the current month and the months ahead"""
+    if not is_partitioned(connection):
+        return 0
+
+    current = month_start(now or datetime.now(timezone.utc))
+    existing = set(list_partitions(connection))
+    created = 0
+    for offset in range(settings.PROCTORING_PARTITION_PREMAKE_MONTHS + 1):
+        start = add_months(current, offset)
+        if partition_name(start) in existing:
+            continue
+        try:
+            # A partition that cannot be created must not hold back the others
+            with connection.begin_nested():
+                create_partition(connection, start)
+            created += 1
+        except Exception as e:
+            logger.error(f"Failed to create partition {partition_name(start)}: {e}")
+    return created
+
+def drop_expired_partitions(connection: Connection, now: datetime = None) -> int:
+    """Drop months older than PROCTORING_RETENTION_MONTHS; 0 keeps everything.
+
+    Returns the number of partitions dropped (rows deleted on SQLite). Expired
+    rows in the default partition are deleted too and only logged.
+    """
+    if settings.PROCTORING_RETENTION_MONTHS <= 0:
+        return 0
+
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -settings.PROCTORING_RETENTION_MONTHS)
+
+    if is_partitioned(connection):
+        dropped = 0
+        for name in list_partitions(connection):
+            if partition_start(name) < cutoff:
+                # Dropping a partition is a metadata operation, no row-by-row delete
+                connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                dropped += 1
+        if has_default_partition(connection):
+            # Rows outside every monthly range end up here; expire them as well
+            stale = connection.execute(text(
+                f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"
+            ), {"cutoff": cutoff}).rowcount
+            if stale:
+                logger.info(f"Deleted {stale} expired rows from {DEFAULT_PARTITION}")
+        return dropped
+
+    result = connection.execute(
+        delete(ProctoringEvent).where(ProctoringEvent.timestamp < cutoff)
+    )
+    return result.rowcount
+
+def maintain_proctoring_storage(reschedule: bool = True) -> None:
+    """Pre-create upcoming partitions and apply retention"""
+    created = expired = 0
+    try:
+        # Separate transactions: retention must keep running even when
+        # partition creation fails
+        try:
+            with writer_engine.begin() as connection:
+                created = ensure_partitions(connection)
+        except Exception as e:
+            logger.error(f"Failed to create proctoring partitions: {e}")
+        try:
+            with writer_engine.begin() as connection:
+                expired = drop_expired_partitions(connection)
+        except Exception as e:
+            logger.error(f"Failed to apply proctoring retention: {e}")
+        if created or expired:
+            logger.info(f"Proctoring storage maintenance: created {created} partitions, expired {expired}")
+    finally:
+        if reschedule:
+            schedule_maintenance()
+
+def schedule_maintenance() -> None:
+    """Schedule the next maintenance pass unless one is already pending"""
+    interval = settings.PROCTORING_MAINTENANCE_INTERVAL_SECONDS
+    if redis_conn.set(MAINTENANCE_LOCK_KEY, 1, nx=True, ex=max(1, interval - 1)):
+        job_queue.enqueue_in(
+            timedelta(seconds=interval),
+            MAINTENANCE_FUNCTION
+        )
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis connections: the sync one is used by the worker and request handlers,
+# the async one by the streaming endpoint so it never blocks the event loop
+redis_conn = redis.Redis.from_url(settings.REDIS_URL)
+async_redis_conn = aioredis.Redis.from_url(settings.REDIS_URL)
+
+TERMINAL_STATUSES = {"completed", "error"}
+
+def submission_channel(submission_id) -> str:
+    """Pub/sub channel carrying status changes for one submission"""
+    return f"submission:{submission_id}:events"
+
+def submission_state_key(submission_id) -> str:
+    """Key holding the last published event, replayed to late subscribers"""
+    return f"submission:{submission_id}:state"
+
+def submission_partial_key(submission_id) -> str:
+    """List of per-test-case results recorded while a submission is running"""
+    return f"submission:{submission_id}:partial"
+
+def submission_status_key(submission_id) -> str:
+    """Hash caching the serialized status document and its ETag"""
+    return f"submission:{submission_id}:status"
+
+def serialize_submission(submission, results: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Build the status document returned to candidates for a submission.
+
+    ``results`` overrides the persisted results, e.g. with the partial
+    results of a submission that is still running.
+    """
+    if results is None:
+        results = [
+            {
+                "test_case_id": result.test_case_id,
+                "verdict": result.verdict.value,
+                "execution_time_ms": result.execution_time_ms,
+                "memory_used_kb": result.memory_used_kb,
+                "score": result.score,
+                "actual_output": result.actual_output,
+                "error_message": result.error_message
+            }
+            for result in submission.results
+        ] if submission.results else []
+
+    return {
+        "submission_id": submission.id,
+        "status": submission.status.value,
+        "overall_verdict": submission.overall_verdict.value if submission.overall_verdict else None,
+        "total_score": submission.total_score,
+        "execution_time_ms": submission.execution_time_ms,
+        "memory_used_kb": submission.memory_used_kb,
+        "compilation_error": submission.compilation_error,
+        "runtime_error": submission.runtime_error,
+        "results": results
+    }
+
+def cache_submission_status(submission_id, candidate_id: int, document: Dict[str, Any], pipe=None) -> Dict[str, str]:
+    """Store a serialized status document with its ETag.
+
+    When ``pipe`` is given the writes are queued on it and executed by the caller.
+    """
+    body = json.dumps(document, sort_keys=True)
+    entry = {
+        "etag": f'"{hashlib.sha1(body.encode()).hexdigest()}"',
+        "candidate_id": str(candidate_id),
+        "body": body
+    }
+
+    own_pipe = pipe is None
+    if own_pipe:
+        pipe = redis_conn.pipeline()
+    pipe.hset(submission_status_key(submission_id), mapping=entry)
+    pipe.expire(submission_status_key(submission_id), settings.SUBMISSION_EVENT_TTL_SECONDS)
+
+    if own_pipe:
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Failed to cache status for submission {submission_id}: {e}")
+
+    return entry
+
+def get_cached_submission_status(submission_id) -> Optional[Dict[str, str]]:
+    """Return the cached status entry (etag, candidate_id, body) of a submission"""
+    try:
+        entry = redis_conn.hgetall(submission_status_key(submission_id))
+    except redis.RedisError as e:
+        logger.warning(f"Failed to read cached status for submission {submission_id}: {e}")
+        return None
+
+    if not entry:
+        return None
+    return {key.decode(): value.decode() for key, value in entry.items()}
+
+def publish_submission_document(submission_id, submission) -> None:
+    """Cache and publish the status document of a submission after a state change.
+
+    ``submission_id`` is the identifier the candidate polls with: the ticket
+    of a queued or running submission, which has no database row yet.
+    """
+    terminal = submission.status.value in TERMINAL_STATUSES
+    # Pending and running submissions have no persisted results to load yet
+    document = serialize_submission(submission, results=None if terminal else [])
+    document["submission_id"] = submission_id
+
+    pipe = redis_conn.pipeline()
+    if submission.status.value == "running":
+        # A (re)started run begins with an empty progress list
+        pipe.delete(submission_partial_key(submission_id))
+    cache_submission_status(submission_id, submission.candidate_id, document, pipe)
+
+    event = dict(document)
+    event.pop("submission_id")
+    status = event.pop("status")
+    _execute_publish(pipe, submission_id, submission.candidate_id, status, event)
+
+def publish_partial_result(submission_id, submission, results: List[Dict[str, Any]],
+                           total: int, running_score: float) -> None:
+    """Record the latest judged test case and publish the running progress"""
+    result = results[-1]
+    document = serialize_submission(submission, results=results)
+    document["submission_id"] = submission_id
+    document["total_score"] = running_score
+
+    pipe = redis_conn.pipeline()
+    pipe.rpush(submission_partial_key(submission_id), json.dumps(result))
+    pipe.expire(submission_partial_key(submission_id), settings.SUBMISSION_EVENT_TTL_SECONDS)
+    cache_submission_status(submission_id, submission.candidate_id, document, pipe)
+    _execute_publish(pipe, submission_id, submission.candidate_id, "running", {
+        "result": result,
+        "progress": {"completed": len(results), "total": total, "running_score": running_score}
+    })
+
+def _execute_publish(pipe, submission_id, candidate_id: int, status: str, data: Dict[str, Any]) -> None:
+    event = {"submission_id": submission_id, "status": status, **data}
+    payload = json.dumps({**event, "candidate_id": candidate_id})
+
+    try:
+        pipe.set(submission_state_key(submission_id), payload, ex=settings.SUBMISSION_EVENT_TTL_SECONDS)
+        pipe.publish(submission_channel(submission_id), payload)
+        pipe.execute()
+    except redis.RedisError as e:
+        # Push delivery is best effort; clients fall back to polling
+        logger.warning(f"Failed to publish event for submission {submission_id}: {e}")
+
+def get_partial_results(submission_id) -> List[Dict[str, Any]]:
+    """Return the test case results judged so far for a running submission"""
+    try:
+        return [json.loads(item) for item in redis_conn.lrange(submission_partial_key(submission_id), 0, -1)]
+    except redis.RedisError as e:
+        logger.warning(f"Failed to read progress for submission {submission_id}: {e}")
+        return []
+
+async def get_submission_state(submission_id) -> Optional[Dict[str, Any]]:
+    """Return the last published event for a submission, if still cached"""
+    payload = await async_redis_conn.get(submission_state_key(submission_id))
+    return json.loads(payload) if payload else None
+
+async def stream_submission_events(submission_id) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """Yield status events for a submission until it reaches a terminal state.
+
+    Yields None whenever no event arrived within the keepalive interval so the
+    caller can write a heartbeat.
+    """
+    pubsub = async_redis_conn.pubsub()
+    await pubsub.subscribe(submission_channel(submission_id))
+
+    try:
+        # Replay the latest state: the job may have progressed before we subscribed
+        state = await get_submission_state(submission_id)
+        if state:
+            yield state
+            if state["status"] in TERMINAL_STATUSES:
+                return
+
+        while True:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=settings.SUBMISSION_STREAM_KEEPALIVE_SECONDS
+            )
+            if message is None:
+                yield None
+                continue
+
+            event = json.loads(message["data"])
+            yield event
+            if event["status"] in TERMINAL_STATUSES:
+                return
+    finally:
+        await pubsub.unsubscribe(submission_channel(submission_id))
+        await pubsub.aclose()
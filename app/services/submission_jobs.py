@@ -0,0 +1,180 @@
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import redis
+from rq import Queue
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
+
+from app.core.config import settings
+from app.models.submission import Submission, SubmissionStatus
+from app.services.submission_events import publish_submission_document
+
+logger = logging.getLogger(__name__)
+
+redis_conn = redis.Redis.from_url(settings.REDIS_URL)
+job_queue = Queue('code_execution', connection=redis_conn)
+
+# Sorted set of tickets that have not been persisted yet, scored by enqueue time
+INFLIGHT_KEY = "submissions:inflight"
+RECONCILE_LOCK_KEY = "submissions:reconcile:scheduled"
+
+EXECUTE_FUNCTION = "app.services.code_executor.execute_code_async"
+RECONCILE_FUNCTION = "app.services.submission_jobs.reconcile_stale_submissions"
+
+def submission_job_key(ticket: str) -> str:
+    """Hash holding the payload of a submission that is queued or running"""
+    return f"submission:{ticket}:job"
+
+def job_timeout() -> int:
+    return settings.CODE_EXECUTION_TIMEOUT + 10
+
+def create_submission_job(candidate_id: int, assessment_id: int, question_id: int,
+                          code: str, language: str, run_type: str) -> str:
+    """Record a new submission in Redis and return its ticket.
+
+    Nothing is written to the database until the worker has judged the code.
+    """
+    ticket = uuid.uuid4().hex
+    job = {
+        "candidate_id": candidate_id,
+        "assessment_id": assessment_id,
+        "question_id": question_id,
+        "code": code,
+        "language": language,
+        "run_type": run_type,
+        "submitted_at": datetime.utcnow(),
+        "attempts": 0
+    }
+
+    pipe = redis_conn.pipeline()
+    pipe.hset(submission_job_key(ticket), mapping={**job, "submitted_at": job["submitted_at"].isoformat()})
+    pipe.expire(submission_job_key(ticket), settings.SUBMISSION_JOB_TTL_SECONDS)
+    pipe.zadd(INFLIGHT_KEY, {ticket: time.time()})
+    pipe.execute()
+
+    publish_submission_document(ticket, build_submission(job, SubmissionStatus.PENDING))
+    return ticket
+
+def enqueue_submission_job(ticket: str, run_type: str) -> Job:
+    """Queue the execution of a submission ticket"""
+    job = job_queue.enqueue(EXECUTE_FUNCTION, ticket, run_type, job_timeout=job_timeout())
+    redis_conn.hset(submission_job_key(ticket), "rq_job_id", job.id)
+    return job
+
+def load_submission_job(ticket: str) -> Optional[Dict[str, Any]]:
+    """Return the payload of a queued or running submission"""
+    payload = redis_conn.hgetall(submission_job_key(ticket))
+    if not payload:
+        return None
+
+    job = {key.decode(): value.decode() for key, value in payload.items()}
+    for field in ("candidate_id", "assessment_id", "question_id", "attempts"):
+        job[field] = int(job[field])
+    job["submitted_at"] = datetime.fromisoformat(job["submitted_at"])
+    return job
+
+def start_submission_job(ticket: str) -> int:
+    """Count an execution attempt for a ticket and return the attempt number"""
+    return redis_conn.hincrby(submission_job_key(ticket), "attempts", 1)
+
+def finish_submission_job(ticket: str) -> None:
+    """Forget a ticket once its submission has been persisted"""
+    pipe = redis_conn.pipeline()
+    pipe.delete(submission_job_key(ticket))
+    pipe.zrem(INFLIGHT_KEY, ticket)
+    pipe.execute()
+
+def build_submission(job: Dict[str, Any], status: SubmissionStatus) -> Submission:
+    """Build the (still transient) Submission row for a ticket payload"""
+    return Submission(
+        candidate_id=job["candidate_id"],
+        question_id=job["question_id"],
+        assessment_id=job["assessment_id"],
+        code=job["code"],
+        language=job["language"],
+        is_final_submission=(job["run_type"] == "submit"),
+        status=status,
+        submitted_at=job["submitted_at"]
+    )
+
+def _rq_job_is_alive(job: Dict[str, Any]) -> bool:
+    rq_job_id = job.get("rq_job_id")
+    if not rq_job_id:
+        return False
+    try:
+        status = Job.fetch(rq_job_id, connection=redis_conn).get_status()
+    except NoSuchJobError:
+        return False
+    return status in (JobStatus.QUEUED, JobStatus.STARTED, JobStatus.DEFERRED, JobStatus.SCHEDULED)
+
+def _reconcile_ticket(ticket: str) -> bool:
+    """Re-queue or give up on one stale ticket; returns whether it was handled"""
+    from app.core.database import SessionLocal
+
+    job = load_submission_job(ticket)
+    if job is None:
+        redis_conn.zrem(INFLIGHT_KEY, ticket)
+        return False
+
+    if _rq_job_is_alive(job):
+        return False
+
+    if job["attempts"] < settings.SUBMISSION_MAX_ATTEMPTS:
+        logger.warning(f"Re-queueing stale submission {ticket} (attempt {job['attempts'] + 1})")
+        redis_conn.zadd(INFLIGHT_KEY, {ticket: time.time()})
+        enqueue_submission_job(ticket, job["run_type"])
+        return True
+
+    logger.error(f"Submission {ticket} failed {job['attempts']} times, persisting as error")
+    submission = build_submission(job, SubmissionStatus.ERROR)
+    submission.runtime_error = "Execution did not complete, please run your code again"
+
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        db.add(submission)
+        db.commit()
+    finally:
+        db.close()
+
+    publish_submission_document(ticket, submission)
+    finish_submission_job(ticket)
+    return True
+
+def reconcile_stale_submissions(reschedule: bool = True) -> int:
+    """Recover tickets whose worker crashed before persisting them.
+
+    Stale tickets are re-queued until they reach SUBMISSION_MAX_ATTEMPTS,
+    after which they are persisted as ERROR so the candidate's code is not
+    lost. Returns the number of tickets handled.
+    """
+    handled = 0
+    try:
+        cutoff = time.time() - job_timeout() - settings.SUBMISSION_RECONCILE_GRACE_SECONDS
+        for raw_ticket in redis_conn.zrangebyscore(INFLIGHT_KEY, 0, cutoff):
+            ticket = raw_ticket.decode()
+            try:
+                handled += _reconcile_ticket(ticket)
+            except Exception as e:
+                # Leave the ticket in flight; the next pass retries it
+                logger.error(f"Failed to reconcile submission {ticket}: {e}")
+    except Exception as e:
+        logger.error(f"Submission reconciliation failed: {e}")
+    finally:
+        if reschedule:
+            schedule_reconciliation()
+
+    return handled
+
+def schedule_reconciliation() -> None:
+    """Schedule the next reconciliation pass unless one is already pending"""
+    interval = settings.SUBMISSION_RECONCILE_INTERVAL_SECONDS
+    # The marker expires just before the scheduled pass runs, so that pass can re-arm it
+    if redis_conn.set(RECONCILE_LOCK_KEY, 1, nx=True, ex=max(1, interval - 1)):
+        job_queue.enqueue_in(
+            timedelta(seconds=interval),
+            RECONCILE_FUNCTION
+        )
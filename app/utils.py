@@ -3,7 +3,7 @@ import hashlib
 import secrets
 import string
 from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
 
 def generate_secure_token(length: int = 32) -> str:
@@ -35,6 +35,12 @@ def calculate_time_remaining(start_time: datetime, duration_minutes: int) -> int
     remaining = max(0, total_seconds - elapsed_seconds)
     return int(remaining)
 
+def to_naive_utc(value: datetime) -> datetime:
+    """Drop the timezone of an aware datetime after converting it to UTC"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
 def format_duration(seconds: int) -> str:
     """Format duration in human-readable format"""
     if seconds < 60:
@@ -123,6 +129,21 @@ def get_client_ip(request) -> Optional[str]:
     
     return None
 
+def accepts_gzip(request) -> bool:
+    """Whether the request's Accept-Encoding allows a gzip response"""
+    for coding in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() not in ('gzip', '*'):
+            continue
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
 def validate_programming_language(language: str) -> bool:
     """Validate if programming language is supported"""
     supported_languages = {'python', 'cpp', 'c', 'java', 'javascript', 'js'}
@@ -5,6 +5,8 @@ import redis
 from rq import Worker, Connection
 from app.core.config import settings
 from app.core.logging_config import setup_logging
+from app.services.submission_jobs import reconcile_stale_submissions
+from app.services.proctoring_storage import maintain_proctoring_storage
 
 # Setup logging
 setup_logging()
@@ -25,11 +27,26 @@ def main():
         logger.error(f"Redis connection failed: {e}")
         sys.exit(1)
     
+    # Recover submissions left behind by a crashed worker; this also
+    # schedules the periodic reconciliation pass
+    try:
+        recovered = reconcile_stale_submissions()
+        logger.info(f"Reconciled {recovered} stale submissions")
+    except Exception as e:
+        logger.error(f"Submission reconciliation failed: {e}")
+    
+    # Create upcoming proctoring partitions and apply retention; this also
+    # schedules the periodic maintenance pass
+    try:
+        maintain_proctoring_storage()
+    except Exception as e:
+        logger.error(f"Proctoring storage maintenance failed: {e}")
+    
     # Create worker
     with Connection(redis_conn):
         worker = Worker(['code_execution', 'default'])
         logger.info("Worker started, waiting for jobs...")
-        worker.work()
+        worker.work(with_scheduler=True)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
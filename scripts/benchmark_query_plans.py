@@ -0,0 +1,194 @@
+"""Compare query plans and timings of the hot queries with and without their indexes.
+
+Builds a synthetic dataset in a scratch database, runs each query with the
+indexes from migration 008 dropped and then recreated, and prints the plan
+and median latency of both runs.
+
+    python scripts/benchmark_query_plans.py
+    python scripts/benchmark_query_plans.py --database-url postgresql://.../empty_db --submissions 500000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select, text
+
+from app.core.database import Base
+from app.models import (
+    Assessment, Candidate, CodeBlob, ProctoringEvent, Question, Submission, SubmissionResult, TestCase
+)
+from app.models.proctoring import ProctoringEventType
+from app.models.question import QuestionType
+from app.models.submission import SubmissionStatus, VerdictType
+
+HOT_INDEXES = {
+    "submissions": ["ix_submissions_candidate_assessment_final", "ix_submissions_candidate_question_submitted"],
+    "submission_results": ["ix_submission_results_submission_id"],
+    "test_cases": ["ix_test_cases_question_id"],
+    "candidates": ["ix_candidates_active"],
+    "questions": ["ix_questions_active"],
+    # Every index that leads with assessment_id, so none of them can stand in
+    "proctoring_events": [
+        "ix_proctoring_events_assessment_timestamp",
+        "ix_proctoring_events_assessment_candidate_timestamp",
+        "ix_proctoring_events_assessment_type_timestamp",
+        "ix_proctoring_events_assessment_violations",
+    ],
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Empty scratch database (default: temporary SQLite file)")
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--assessments", type=int, default=20)
+    parser.add_argument("--submissions", type=int, default=200000)
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=20)
+    return parser.parse_args()
+
+def insert_batches(connection, model, rows, batch_size=5000):
+    for start in range(0, len(rows), batch_size):
+        connection.execute(insert(model), rows[start:start + batch_size])
+
+def seed(engine, args):
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+
+    with engine.begin() as connection:
+        insert_batches(connection, Candidate, [
+            {"name": f"Candidate {i}", "email": f"candidate{i}@example.com", "is_active": rng.random() > 0.2}
+            for i in range(1, args.candidates + 1)
+        ])
+        insert_batches(connection, Question, [
+            {"title": f"Question {i}", "description": "-", "question_type": QuestionType.CODING, "is_active": rng.random() > 0.2}
+            for i in range(1, args.questions + 1)
+        ])
+        insert_batches(connection, TestCase, [
+            {"question_id": q, "input_data": "1", "expected_output": "1", "is_public": t == 0}
+            for q in range(1, args.questions + 1) for t in range(5)
+        ])
+        insert_batches(connection, Assessment, [
+            {"title": f"Assessment {i}", "total_time_minutes": 60} for i in range(1, args.assessments + 1)
+        ])
+        connection.execute(insert(CodeBlob), [{"hash": "0" * 64, "data": b"", "size": 0}])
+
+        submissions = []
+        for i in range(args.submissions):
+            submissions.append({
+                "candidate_id": rng.randint(1, args.candidates),
+                "question_id": rng.randint(1, args.questions),
+                "assessment_id": rng.randint(1, args.assessments),
+                "code_hash": "0" * 64,
+                "language": "python",
+                "is_final_submission": rng.random() < 0.1,
+                "status": SubmissionStatus.COMPLETED,
+                "submitted_at": now - timedelta(seconds=rng.randint(0, 30 * 86400))
+            })
+        insert_batches(connection, Submission, submissions)
+        insert_batches(connection, SubmissionResult, [
+            {"submission_id": s, "test_case_id": 1, "verdict": VerdictType.OK}
+            for s in range(1, args.submissions + 1) for _ in range(3)
+        ])
+
+        event_types = list(ProctoringEventType)
+        insert_batches(connection, ProctoringEvent, [
+            {
+                "candidate_id": rng.randint(1, args.candidates),
+                "assessment_id": rng.randint(1, args.assessments),
+                "event_type": rng.choice(event_types),
+                "is_violation": rng.random() < 0.05,
+                "timestamp": now - timedelta(seconds=rng.randint(0, 30 * 86400))
+            }
+            for _ in range(args.events)
+        ])
+
+def hot_queries(args):
+    candidate_id = args.candidates // 2
+    assessment_id = args.assessments // 2
+    question_id = args.questions // 2
+    return {
+        "final submissions (scoring)": select(Submission.id, Submission.total_score).where(
+            Submission.candidate_id == candidate_id,
+            Submission.assessment_id == assessment_id,
+            Submission.is_final_submission == True
+        ),
+        "latest submission (question page)": select(Submission.id).where(
+            Submission.candidate_id == candidate_id,
+            Submission.question_id == question_id
+        ).order_by(Submission.submitted_at.desc()).limit(1),
+        "results of a submission": select(SubmissionResult.id).where(
+            SubmissionResult.submission_id == args.submissions // 2
+        ),
+        "test cases of a question": select(TestCase.id).where(TestCase.question_id == question_id),
+        "active candidates": select(Candidate.id).where(Candidate.is_active == True),
+        "active questions": select(Question.id).where(Question.is_active == True),
+        "proctoring page": select(ProctoringEvent.id).where(
+            ProctoringEvent.assessment_id == assessment_id
+        ).order_by(ProctoringEvent.timestamp.desc(), ProctoringEvent.id.desc()).limit(50),
+    }
+
+def explain(connection, statement):
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if connection.dialect.name == "sqlite" else "EXPLAIN "
+    rows = connection.execute(text(prefix + sql)).fetchall()
+    return [" ".join(str(column) for column in row) for row in rows]
+
+def measure(engine, queries, repeat):
+    report = {}
+    with engine.connect() as connection:
+        for name, statement in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                connection.execute(statement).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            report[name] = (explain(connection, statement), statistics.median(timings))
+    return report
+
+def set_hot_indexes(engine, present):
+    with engine.begin() as connection:
+        for table_name, names in HOT_INDEXES.items():
+            for index in Base.metadata.tables[table_name].indexes:
+                if index.name in names:
+                    if present:
+                        index.create(connection, checkfirst=True)
+                    else:
+                        index.drop(connection, checkfirst=True)
+        connection.execute(text("ANALYZE"))
+
+def main():
+    args = parse_args()
+    url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+    engine = create_engine(url)
+
+    print(f"Seeding {url} ...")
+    Base.metadata.create_all(engine)
+    seed(engine, args)
+    queries = hot_queries(args)
+
+    set_hot_indexes(engine, present=False)
+    before = measure(engine, queries, args.repeat)
+    set_hot_indexes(engine, present=True)
+    after = measure(engine, queries, args.repeat)
+
+    for name in queries:
+        plan_before, ms_before = before[name]
+        plan_after, ms_after = after[name]
+        print(f"\n=== {name}: {ms_before:.2f} ms -> {ms_after:.2f} ms")
+        print("  before:")
+        for line in plan_before:
+            print(f"    {line}")
+        print("  after:")
+        for line in plan_after:
+            print(f"    {line}")
+
+if __name__ == "__main__":
+    main()
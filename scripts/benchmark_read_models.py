@@ -0,0 +1,160 @@
+"""Compare ORM entities with the read-only rows of app.repositories.read_models.
+
+Seeds a scratch database with one assessment assigned to every candidate,
+then loads the admin lists both ways and prints the median latency and the
+peak Python memory of each.
+
+    python scripts/benchmark_read_models.py
+    python scripts/benchmark_read_models.py --database-url postgresql://.../empty_db --candidates 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from app.core.database import Base
+from app.models import Assessment, AssessmentCandidate, Candidate, CodeBlob, Question, Submission
+from app.models.assessment import AssessmentCandidateStatus
+from app.models.question import QuestionType
+from app.models.submission import SubmissionStatus, VerdictType
+from app.repositories.read_models import (
+    iter_final_submissions, list_active_candidates, list_assessment_results
+)
+
+ASSESSMENT_ID = 1
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Empty scratch database (default: temporary SQLite file)")
+    parser.add_argument("--candidates", type=int, default=50000)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+def insert_batches(connection, model, rows, batch_size=5000):
+    for start in range(0, len(rows), batch_size):
+        connection.execute(insert(model), rows[start:start + batch_size])
+
+def seed(engine, args):
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    statuses = list(AssessmentCandidateStatus)
+
+    with engine.begin() as connection:
+        connection.execute(insert(Assessment), [{"title": "Hiring drive", "total_time_minutes": 90}])
+        insert_batches(connection, Question, [
+            {"title": f"Question {i}", "description": "-" * 2000, "question_type": QuestionType.CODING}
+            for i in range(1, args.questions + 1)
+        ])
+        insert_batches(connection, Candidate, [
+            {"name": f"Candidate {i}", "email": f"candidate{i}@example.com", "position": "Engineer",
+             "experience_years": rng.randint(0, 15), "skills": "python,sql", "is_active": True}
+            for i in range(1, args.candidates + 1)
+        ])
+        insert_batches(connection, AssessmentCandidate, [
+            {"assessment_id": ASSESSMENT_ID, "candidate_id": i, "status": rng.choice(statuses),
+             "access_token": f"token-{i}", "total_score": rng.uniform(0, 100),
+             "percentage_score": rng.uniform(0, 100), "started_at": now - timedelta(hours=2)}
+            for i in range(1, args.candidates + 1)
+        ])
+        connection.execute(insert(CodeBlob), [{"hash": "0" * 64, "data": b"", "size": 0}])
+        insert_batches(connection, Submission, [
+            {"candidate_id": i, "question_id": q, "assessment_id": ASSESSMENT_ID, "code_hash": "0" * 64,
+             "language": "python", "is_final_submission": True, "status": SubmissionStatus.COMPLETED,
+             "overall_verdict": VerdictType.OK, "total_score": rng.uniform(0, 100), "submitted_at": now}
+            for i in range(1, args.candidates + 1) for q in range(1, args.questions + 1)
+        ])
+
+def orm_results(db):
+    results = db.query(AssessmentCandidate).options(
+        joinedload(AssessmentCandidate.candidate)
+    ).filter(
+        AssessmentCandidate.assessment_id == ASSESSMENT_ID
+    ).order_by(AssessmentCandidate.total_score.desc()).all()
+    return [(r.candidate.name, r.candidate.email, r.status, r.total_score, r.percentage_score) for r in results]
+
+def row_results(db):
+    results = list_assessment_results(db, ASSESSMENT_ID, by_score=True)
+    return [(r.candidate_name, r.candidate_email, r.status, r.total_score, r.percentage_score) for r in results]
+
+def orm_candidates(db):
+    candidates = db.query(Candidate).filter(Candidate.is_active == True).all()
+    return [(c.id, c.name, c.email, c.position) for c in candidates]
+
+def row_candidates(db):
+    return [(c.id, c.name, c.email, c.position) for c in list_active_candidates(db)]
+
+def orm_submissions(db):
+    submissions = db.query(Submission).options(
+        joinedload(Submission.candidate)
+    ).filter(
+        Submission.assessment_id == ASSESSMENT_ID,
+        Submission.is_final_submission == True
+    ).all()
+    return [(s.candidate.name, s.language, s.overall_verdict, s.total_score) for s in submissions]
+
+def row_submissions(db):
+    return [(s.candidate_name, s.language, s.overall_verdict, s.total_score)
+            for s in iter_final_submissions(db, ASSESSMENT_ID)]
+
+def measure(session_factory, load, repeat):
+    """Median milliseconds of ``load`` and the peak MiB while its result is alive.
+
+    Memory is traced in a separate run, since tracemalloc slows allocation down.
+    """
+    timings = []
+    for _ in range(repeat):
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            load(db)
+            timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            db.close()
+
+    db = session_factory()
+    try:
+        tracemalloc.start()
+        result = load(db)
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+        del result
+    finally:
+        db.close()
+    return statistics.median(timings), peak
+
+def main():
+    args = parse_args()
+    url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+    engine = create_engine(url)
+    session_factory = sessionmaker(bind=engine)
+
+    print(f"Seeding {url} with {args.candidates} candidates ...")
+    Base.metadata.create_all(engine)
+    seed(engine, args)
+
+    cases = {
+        "assessment results": (orm_results, row_results),
+        "active candidates": (orm_candidates, row_candidates),
+        "final submissions export": (orm_submissions, row_submissions),
+    }
+    for name, (orm_load, row_load) in cases.items():
+        orm_ms, orm_mib = measure(session_factory, orm_load, args.repeat)
+        row_ms, row_mib = measure(session_factory, row_load, args.repeat)
+        print(f"\n=== {name}")
+        print(f"  ORM entities: {orm_ms:8.1f} ms  {orm_mib:7.1f} MiB peak")
+        print(f"  read rows:    {row_ms:8.1f} ms  {row_mib:7.1f} MiB peak")
+        print(f"  saving:       {1 - row_ms / orm_ms:8.0%}     {1 - row_mib / orm_mib:7.0%}")
+
+if __name__ == "__main__":
+    main()
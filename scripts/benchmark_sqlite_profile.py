@@ -0,0 +1,227 @@
+"""Compare SQLite with and without the performance profile under concurrent writes.
+
+Runs the same mix of auto-save flushes, code runs (a submission with its
+test results) and status polls for many candidates, some through sync
+sessions on threads and some through async sessions on an event loop, as in
+the web process. It runs first against plain SQLite engines (rollback
+journal, writers racing for the file lock) and then with the profile from
+app.core.database (WAL, pragmas, one writer connection per engine), and prints
+throughput, latencies and "database is locked" failures.
+
+    python scripts/benchmark_sqlite_profile.py
+    python scripts/benchmark_sqlite_profile.py --threads 32 --operations 300
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database import (
+    Base, SingleWriterSession, async_database_url, compact_json, configure_sqlite, sqlite_writer_options
+)
+from app.models import Assessment, Candidate, Question, Submission, SubmissionResult, TestCase
+from app.models.code_history import CodeSnapshotSource
+from app.models.question import QuestionType
+from app.models.submission import SubmissionStatus, VerdictType
+from app.services.code_history import record_snapshot
+
+ASSESSMENT_ID = 1
+QUESTION_ID = 1
+TEST_CASES = 3
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent candidates on sync sessions")
+    parser.add_argument("--async-candidates", type=int, default=16, help="Concurrent candidates on async sessions")
+    parser.add_argument("--operations", type=int, default=200, help="Operations per candidate")
+    parser.add_argument("--run-share", type=float, default=0.2, help="Share of code runs")
+    parser.add_argument("--poll-share", type=float, default=0.3, help="Share of status polls")
+    return parser.parse_args()
+
+def plain_session_factories(url):
+    """The engines as configured before the profile existed"""
+    engine = create_engine(url, json_serializer=compact_json, connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(async_database_url(url), json_serializer=compact_json)
+    return (
+        sessionmaker(bind=engine, autoflush=False),
+        async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False),
+        [engine],
+        [async_engine]
+    )
+
+def profile_session_factories(url):
+    engine = create_engine(url, json_serializer=compact_json, connect_args={"check_same_thread": False})
+    writer = create_engine(url, json_serializer=compact_json, **sqlite_writer_options())
+    async_engine = create_async_engine(async_database_url(url), json_serializer=compact_json)
+    async_writer = create_async_engine(
+        async_database_url(url), json_serializer=compact_json, **sqlite_writer_options(is_async=True)
+    )
+    configure_sqlite(engine)
+    configure_sqlite(writer, writer=True)
+    configure_sqlite(async_engine.sync_engine)
+    configure_sqlite(async_writer.sync_engine, writer=True)
+    return (
+        sessionmaker(class_=SingleWriterSession, bind=engine, writer=writer, autoflush=False),
+        async_sessionmaker(async_engine, sync_session_class=SingleWriterSession, autoflush=False,
+                           expire_on_commit=False, writer=async_writer.sync_engine),
+        [engine, writer],
+        [async_engine, async_writer]
+    )
+
+def seed(url, args):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Assessment), [{"title": "Hiring drive", "total_time_minutes": 90}])
+        connection.execute(insert(Question), [
+            {"title": "Two sum", "description": "-", "question_type": QuestionType.CODING}
+        ])
+        connection.execute(insert(TestCase), [
+            {"question_id": QUESTION_ID, "input_data": "1", "expected_output": "1"} for _ in range(TEST_CASES)
+        ])
+        connection.execute(insert(Candidate), [
+            {"name": f"Candidate {i}", "email": f"candidate{i}@example.com"}
+            for i in range(1, args.threads + args.async_candidates + 1)
+        ])
+    engine.dispose()
+
+def autosave(db: Session, candidate_id: int, step: int):
+    code = "def solve(nums, target):\n" + "".join(f"    step_{i} = {i}\n" for i in range(step % 50 + 1))
+    record_snapshot(db, candidate_id, ASSESSMENT_ID, QUESTION_ID, code, "python", CodeSnapshotSource.AUTOSAVE)
+    db.commit()
+
+def run(db: Session, candidate_id: int, step: int):
+    submission = Submission(
+        candidate_id=candidate_id,
+        question_id=QUESTION_ID,
+        assessment_id=ASSESSMENT_ID,
+        language="python",
+        status=SubmissionStatus.COMPLETED,
+        overall_verdict=VerdictType.OK
+    )
+    submission.code = f"print({candidate_id} + {step})"
+    db.add(submission)
+    db.flush()
+    db.add_all([
+        SubmissionResult(submission_id=submission.id, test_case_id=test_case_id, verdict=VerdictType.OK,
+                         actual_output="1")
+        for test_case_id in range(1, TEST_CASES + 1)
+    ])
+    db.commit()
+
+def poll(db: Session, candidate_id: int, step: int):
+    db.execute(select(Submission.id, Submission.status).where(
+        Submission.candidate_id == candidate_id
+    ).order_by(Submission.id.desc()).limit(1)).first()
+    db.rollback()
+
+def pick_operation(rng, args):
+    roll = rng.random()
+    if roll < args.run_share:
+        return "run", run
+    if roll < args.run_share + args.poll_share:
+        return "status poll", poll
+    return "auto-save", autosave
+
+def run_workload(session_factory, async_session_factory, async_engines, args):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def record(name, started, error=None):
+        with lock:
+            if error is None:
+                latencies[name].append(time.perf_counter() - started)
+            else:
+                errors[name] += 1
+        if error is not None and "locked" not in str(error) and "busy" not in str(error):
+            raise error
+
+    def candidate(candidate_id):
+        rng = random.Random(candidate_id)
+        for step in range(args.operations):
+            name, operation = pick_operation(rng, args)
+            db = session_factory()
+            started = time.perf_counter()
+            try:
+                operation(db, candidate_id, step)
+                record(name, started)
+            except OperationalError as e:
+                db.rollback()
+                record(name, started, e)
+            finally:
+                db.close()
+
+    async def async_candidate(candidate_id):
+        rng = random.Random(candidate_id)
+        for step in range(args.operations):
+            name, operation = pick_operation(rng, args)
+            started = time.perf_counter()
+            async with async_session_factory() as db:
+                try:
+                    await db.run_sync(operation, candidate_id, step)
+                    record(name, started)
+                except OperationalError as e:
+                    await db.rollback()
+                    record(name, started, e)
+
+    async def async_candidates():
+        first = args.threads + 1
+        await asyncio.gather(*[
+            async_candidate(candidate_id) for candidate_id in range(first, first + args.async_candidates)
+        ])
+        # Async connections have to be closed on the loop that opened them
+        for engine in async_engines:
+            await engine.dispose()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads + 1) as executor:
+        # The async candidates share one event loop, like a web process
+        loop_done = executor.submit(asyncio.run, async_candidates())
+        list(executor.map(candidate, range(1, args.threads + 1)))
+        loop_done.result()
+    return time.perf_counter() - started, latencies, errors
+
+def summarize(name, wall, latencies, errors):
+    completed = sum(len(values) for values in latencies.values())
+    print(f"\n=== {name}")
+    print(f"  wall time:  {wall:8.2f} s   throughput: {completed / wall:8.1f} ops/s")
+    for operation in ("auto-save", "run", "status poll"):
+        values = sorted(latencies.get(operation, []))
+        if not values:
+            print(f"  {operation:12} no successful operations, {errors[operation]} locked")
+            continue
+        p95 = values[max(int(len(values) * 0.95) - 1, 0)]
+        print(f"  {operation:12} p50 {statistics.median(values) * 1000:8.1f} ms   "
+              f"p95 {p95 * 1000:8.1f} ms   locked {errors[operation]:5}")
+
+def main():
+    args = parse_args()
+    directory = tempfile.mkdtemp()
+    print(f"{args.threads} sync and {args.async_candidates} async candidates x {args.operations} operations "
+          f"in {directory}")
+
+    for name, factories in (("plain SQLite", plain_session_factories), ("SQLite profile", profile_session_factories)):
+        url = f"sqlite:///{directory}/{name.replace(' ', '_').lower()}.db"
+        seed(url, args)
+        session_factory, async_session_factory, engines, async_engines = factories(url)
+        summarize(name, *run_workload(session_factory, async_session_factory, async_engines, args))
+        for engine in engines:
+            engine.dispose()
+
+if __name__ == "__main__":
+    main()